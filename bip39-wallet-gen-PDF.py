@@ -36,19 +36,57 @@ setup_virtual_environment()
 
 from mnemonic import Mnemonic
 # YLCN: I added Bip49Coins and Bip84Coins enum imports
-from bip_utils import Bip39SeedGenerator, Bip44, Bip49, Bip84, Bip44Coins, Bip44Changes, Bip49Coins, Bip84Coins
+from bip_utils import Bip44, Bip49, Bip84, Bip44Coins, Bip44Changes, Bip49Coins, Bip84Coins
+from wallet_seed import mnemonic_to_seed
 from datetime import datetime
-import qrcode
-import base64
-from io import BytesIO
+from wallet_qr import qr_image, qr_matrix, matrix_to_image, pack_matrix, unpack_matrix
+from seedqr import mnemonic_qr_image, MNEMONIC_QR_LABELS
 from fpdf import FPDF
 from fpdf.enums import XPos, YPos
+from pypdf import PdfReader
+from streaming_pdf import StreamingPDF
+import tempfile
+import contextlib
+from wallet_verify import Verifier, staged_output
+from wallet_ec import public_child_keys
+from wallet_export import WalletExportWriter
+from wallet_sidecar import write_sidecar, load_sidecar
+from wallet_jobs import parse_jobs, run_jobs, shared_executor, job_file_name, check_new_target
+
+# Address books above this size are rendered in parallel chunks (see create_address_book_pdf)
+LARGE_ADDRESS_BOOK_THRESHOLD = 100
+# Number of address rows each worker process renders into one partial PDF
+ADDRESS_BOOK_CHUNK_SIZE = 250
+# Printed addresses are re-derived from the printed words by wallet_verify in worker processes.
+# Fraction of addresses to check (0 disables verification) and optional time budget in seconds
+VERIFY_SAMPLE_RATE = 1.0
+VERIFY_TIME_BUDGET = None
+# Public wallet data (xpubs, paths, addresses, time) is also written here in the wallet_export format, None disables it
+EXPORT_PATH = None
+# Mnemonic QR code content: 'words' (the word string), 'seedqr' or 'compact_seedqr' (see seedqr.py)
+MNEMONIC_QR_FORMAT = 'words'
+# Public-only sidecars (xpubs, addresses, QR matrices) are written to this directory, None disables it.
+# Rerender the public pages later with: python bip39-wallet-gen-PDF.py --from-sidecar <file>
+SIDECAR_DIR = None
+# Bump when the layout of the public pages or the QR settings change, older sidecars are then ignored
+PDF_LAYOUT_VERSION = 1
+# Settings of one run, for job spec files and command line flags (see wallet_jobs.py)
+JOB_FIELDS = {
+    'words': (int, 24, "mnemonic length", (12, 24)),
+    'name': (str, "", "name of the seed", None),
+    'addresses': (int, 3, "number of addresses per BIP type", None),
+    'output': (str, None, "output PDF file", None),
+    'export': (str, EXPORT_PATH, "also write the public wallet data to this wallet_export file", None),
+    'from_sidecar': (str, None, "rebuild the public pages from this sidecar instead of a new seed", None),
+}
 
 def get_user_input():
     strength_choice = input("Choose mnemonic length (12 or 24 words): ").strip()
     strength = 128 if strength_choice == "12" else 256
     seed_name = input("Enter a name for the seed (optional): ").strip()
-    return strength, seed_name
+    address_count_choice = input("Number of addresses per BIP type (default 3): ").strip()
+    n_address_count = int(address_count_choice) if address_count_choice else 3
+    return strength, seed_name, n_address_count
 
 def generate_mnemonic(strength):
     mnemo = Mnemonic("english")
@@ -56,24 +94,20 @@ def generate_mnemonic(strength):
 
 
 def generate_qr_code(data):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=5,  # Reduced from 10 to 5
-        border=2,    # Reduced from 4 to 2
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
     # YLCN: This returns img object instead of base64 text encoded formaat
-    return img
+    # wallet_qr pins version and mask for addresses and xpubs, box size 5 and border 2 as before
+    return qr_image(data, box_size=5, border=2)
 
 def formatted_now(dt):    
     return dt.utcnow().strftime("%d.%m.%Y %H:%M UTC")
     
    
 def get_seed_bytes(mnemonic):
-    return Bip39SeedGenerator(mnemonic).Generate()
+    return mnemonic_to_seed(mnemonic)
+
+
+def get_master_fingerprint(seed_bytes):
+    return Bip44.FromSeed(seed_bytes, Bip44Coins.BITCOIN).Bip32Object().FingerPrint().ToHex()
 
 
 def derive_root_keys(seed_bytes):    
@@ -128,7 +162,8 @@ def derive_extended_pub_keys(seed_bytes):
 
 def derive_derived_addresses(seed_bytes,n_address_count=3):
     """
-        This functions creates derived keys and returns as dictionary
+        This functions creates derived keys and returns as dictionary.
+        QR codes are not created here, they are generated lazily when the table row is laid out
     """
     
     # YLCN: This dictionary is used in the for loop for appropriate constant
@@ -143,12 +178,31 @@ def derive_derived_addresses(seed_bytes,n_address_count=3):
         # YLCN second parameter used in FromSeed function below was BIP44Coins.BITCOIN
         # for all bip types, I changed it so that appropriate format is used for each type
         bip_obj = bip_cls.FromSeed(seed_bytes, bip_coins[bip_type])
+        # derive the external chain once instead of walking the whole path for every index
+        change = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT)
         derived_addresses[bip_type] = []
         for i in range(n_address_count):
-            address = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(i).PublicKey().ToAddress()
-            address_qr_code = generate_qr_code(address)
-            derived_addresses[bip_type].append({'address':address,'qr_code':address_qr_code})
+            address = change.AddressIndex(i).PublicKey().ToAddress()
+            derived_addresses[bip_type].append({'address':address})
     return derived_addresses
+
+
+def derive_addresses_from_xpub(bip_type, account_ext_pub_key, start, stop):
+    """
+        Derives external chain addresses [start, stop) from an account extended public key.
+        Used by the address book workers so that they never see the seed. The public keys
+        come from the wallet_ec derivation backend, bip_utils encodes the addresses
+    """
+    bip_classes = {
+        'BIP44': (Bip44, Bip44Coins.BITCOIN),
+        'BIP49': (Bip49, Bip49Coins.BITCOIN),
+        'BIP84': (Bip84, Bip84Coins.BITCOIN)
+    }
+    bip_cls, coin_type = bip_classes[bip_type]
+    change = bip_cls.FromExtendedKey(account_ext_pub_key, coin_type).Change(Bip44Changes.CHAIN_EXT)
+    addr_class, addr_params = change.CoinConf().AddrClass(), change.CoinConf().AddrParams()
+    public_key, chain_code = change.PublicKey().RawCompressed().ToBytes(), change.PublicKey().ChainCode().ToBytes()
+    return [addr_class.EncodeKey(child, **addr_params) for child in public_child_keys(public_key, chain_code, start, stop)]
     
     
 # Helper pdf methods for creating tables
@@ -184,15 +238,60 @@ def create_derived_addresses_table_data(derived_addresses):
         table_data[bip_type].append(['No', 'Address', 'QR Code','Notes'])    
         
         for index,address_data in enumerate(derived_addresses[bip_type]):
+            # the address itself goes in the QR column, the image is made when the row is laid out
             table_data[bip_type].append([
                                str(index+1),
                                address_data['address'],
-                               address_data['qr_code'],
+                               address_data['address'],
                                ''
                                ])
     return table_data
 
 
+def table_row_path(bip_type, data_row):
+    # rows are numbered from 1, address indexes from 0
+    return f"m/{bip_type[3:]}'/0'/0'/0/{int(data_row[0]) - 1}"
+
+
+def submit_table_for_verification(verifier, mnemonic, bip_type, table_data, packed_matrices):
+    """
+        Hands the rows of one derived address table (as laid out) to the verifier, with
+        the QR matrix drawn in each row, which is what gets scanned
+    """
+    for data_row, packed in zip(table_data[1:], packed_matrices):
+        verifier.submit(mnemonic.split(), data_row[1], table_row_path(bip_type, data_row), qr=packed)
+
+
+def export_table(exporter, seed_name, xpub_keys, bip_type, table_data, date_time_now):
+    """
+        Writes the public data of one derived address table to the export file
+    """
+    for data_row in table_data[1:]:
+        exporter.add(seed_name, xpub_keys[bip_type]['key'], table_row_path(bip_type, data_row), data_row[1], date_time_now)
+
+
+def add_derived_addresses_table(pdf, table_data, qr_matrices=None):
+    """
+        Lays out one derived address table, the QR code of each row is generated right here
+        (or taken from qr_matrices, one packed matrix per row, when rendering from a sidecar)
+        and handed to fpdf as an in-memory image (no temp files).
+        Returns the packed QR matrices of the rows so they can go into the sidecar
+    """
+    packed_matrices = []
+    with pdf.table(padding=2,col_widths=[10,85,30,30],) as table:
+        for i, data_row in enumerate(table_data):
+            row = table.row()
+            for j, datum in enumerate(data_row):
+                if j == 2 and i>0:
+                    packed = qr_matrices[i-1] if qr_matrices else pack_matrix(qr_matrix(datum))
+                    packed_matrices.append(packed)
+                    # same box size and border as generate_qr_code
+                    row.cell(img=matrix_to_image(unpack_matrix(packed), box_size=5, border=2), img_fill_width=True)
+                else:
+                    row.cell(datum,)
+    return packed_matrices
+
+
 
 # This class allows to edit footer (and header if needed)
 class MyPDF(FPDF):
@@ -217,31 +316,61 @@ class MyPDF(FPDF):
         # Setting font: helvetica italic 8
         self.set_font("helvetica", "I", 8)
         # Printing page number:
-        self.cell(0, 10, f"Page {self.page_no()}/{{nb}}   {self.seed_name} ({self.now}) ", align="C")
+        # address book parts get their footers stamped when they are merged (merge_parts)
+        if getattr(self, 'merged_later', False):
+            return
+        self.cell(0, 10, footer_text(self.page_no(), "{nb}", self.seed_name, self.now), align="C")
+
+
+def footer_text(page_no, page_count, seed_name, now):
+    return f"Page {page_no}/{page_count}   {seed_name} ({now}) "
         
  
  
-def create_pdf(seed_name, mnemonic):
-    # first create raw data 
-    seed_bytes = get_seed_bytes(mnemonic)
-    root_keys = derive_root_keys(seed_bytes)
-    xpub_keys = derive_extended_pub_keys(seed_bytes)
-    derived_addresses = derive_derived_addresses(seed_bytes)
-    
-    # convert data to table format
-    root_keys_table_data = create_root_keys_table_data(root_keys)
-    xpub_keys_table_data = create_xpub_keys_table_data(xpub_keys)
-    derived_addresses_table_data = create_derived_addresses_table_data(derived_addresses)
-    
-    
-    date_time_now = datetime.now()
-    now_text = date_time_now.strftime("%d%m%Y_%H%M")
-    file_name = f"{seed_name}_{now_text}.pdf" if seed_name else f"{now_text}.pdf"
-    
+def new_pdf(seed_name, date_time_now, merged_later=False):
     pdf = MyPDF()
     pdf.seed_name = seed_name # we assign the variables so that it can be used in footer 
     pdf.now = formatted_now(date_time_now) # we assign the variables so that it can be used in footer 
-    
+    pdf.merged_later = merged_later
+    return pdf
+
+
+def merge_parts(part_paths, file_name, seed_name, date_time_now):
+    """
+        Joins the partial PDFs into file_name page by page (streaming_pdf), so memory does
+        not grow with the document, and stamps the footer of MyPDF with the page number of
+        the joined document on every page
+    """
+    page_count = sum(len(PdfReader(part_path).pages) for part_path in part_paths)
+    # the footer is placed like MyPDF.footer: a centered 10 mm high cell 15 mm above the
+    # bottom edge, measured with fpdf so it lands where fpdf would have put it
+    measure = new_pdf(seed_name, date_time_now)
+    measure.set_font("helvetica", "I", 8)
+    baseline = measure.h - 15 + 5 + 0.3 * measure.font_size
+    output = StreamingPDF(file_name, measure.w, measure.h)
+    page_no = 0
+    for part_path in part_paths:
+        for page in PdfReader(part_path).pages:
+            page_no += 1
+            output.import_page(page)
+            text = footer_text(page_no, page_count, measure.seed_name, measure.now)
+            width = measure.w - measure.l_margin - measure.r_margin
+            output.text(measure.l_margin + (width - measure.get_string_width(text)) / 2, baseline, text, size=8, style='I')
+    output.close()
+
+
+def add_derived_addresses_heading(pdf):
+    pdf.ln(8)    
+    pdf.set_font('helvetica','B',size=12)
+    pdf.cell(w=0, text='Derived Addresses', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.set_font('helvetica',size=11)
+    pdf.ln(8)
+
+
+def add_seed_information_pages(pdf, seed_name, mnemonic, root_keys_table_data, xpub_keys_table_data):
+    """
+        Seed information (mnemonic, root keys) and account extended public keys pages
+    """
     color_1 = (120,120,120)
     
     # First page title-seed name and generated time info
@@ -275,8 +404,8 @@ def create_pdf(seed_name, mnemonic):
         pdf.cell(w=0, text=f'{i+1:>2}. {word}', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
 
     # Place Mneminic qr code image
-    mnemonic_qr = generate_qr_code(mnemonic)
-    pdf.text(text='Mnemonic QR Code', x=62,y = MNEMONIC_SECTION_Y)
+    mnemonic_qr = mnemonic_qr_image(mnemonic, MNEMONIC_QR_FORMAT, box_size=5, border=2)
+    pdf.text(text=f'Mnemonic QR Code{MNEMONIC_QR_LABELS[MNEMONIC_QR_FORMAT]}', x=62,y = MNEMONIC_SECTION_Y)
     mnemonic_qr_path = "temp_mnemonic_qr.png"
     mnemonic_qr.save(mnemonic_qr_path)
     pdf.image(mnemonic_qr_path, x=60, y=MNEMONIC_SECTION_Y + 3, w=35, h=35)
@@ -295,6 +424,10 @@ def create_pdf(seed_name, mnemonic):
             
 
     pdf.ln(8)
+    add_xpub_keys_page(pdf, xpub_keys_table_data)
+
+
+def add_xpub_keys_page(pdf, xpub_keys_table_data):
     # We add a new page to start extended public keys from start
     pdf.add_page()
     pdf.set_font('helvetica','B',size=12)
@@ -314,40 +447,249 @@ def create_pdf(seed_name, mnemonic):
                     row.cell(datum)     
 
 
-    pdf.ln(8)    
-    pdf.set_font('helvetica','B',size=12)
-    pdf.cell(w=0, text='Derived Addresses', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-    pdf.set_font('helvetica',size=11)
-    pdf.ln(8)
+
+
+def default_pdf_name(seed_name, date_time_now, public=False):
+    now_text = date_time_now.strftime("%d%m%Y_%H%M")
+    if public:
+        seed_name = f"{seed_name}_public" if seed_name else "public"
+    return f"{seed_name}_{now_text}.pdf" if seed_name else f"{now_text}.pdf"
+
+
+def create_pdf(seed_name, mnemonic, n_address_count=3, file_name=None, export_path=EXPORT_PATH):
+    if n_address_count > LARGE_ADDRESS_BOOK_THRESHOLD:
+        return create_address_book_pdf(seed_name, mnemonic, n_address_count, file_name, export_path)
+
+    # first create raw data 
+    seed_bytes = get_seed_bytes(mnemonic)
+    root_keys = derive_root_keys(seed_bytes)
+    xpub_keys = derive_extended_pub_keys(seed_bytes)
+    derived_addresses = derive_derived_addresses(seed_bytes, n_address_count)
     
-    for bip_type in derived_addresses_table_data:
-        pdf.ln(8)
-        pdf.set_font('helvetica','B',size=12)
-        pdf.cell(w=0, text=bip_type, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
-        pdf.ln(2)
-        with pdf.table(padding=2,col_widths=[10,85,30,30],) as table:
-            for i, data_row in enumerate(derived_addresses_table_data[bip_type]):
-                row = table.row()
-                for j, datum in enumerate(data_row):                   
-                    if j == 2 and i>0:
-                       temp_qr_path = f"temp_derived_{bip_type}_{i}_{j}.png"
-                       datum.save(temp_qr_path)
-                       row.cell(img=temp_qr_path, img_fill_width=True)
-                    else:
-                        row.cell(datum,)
+    # convert data to table format
+    root_keys_table_data = create_root_keys_table_data(root_keys)
+    xpub_keys_table_data = create_xpub_keys_table_data(xpub_keys)
+    derived_addresses_table_data = create_derived_addresses_table_data(derived_addresses)
+    
+    
+    date_time_now = datetime.now()
+    if not file_name:
+        file_name = default_pdf_name(seed_name, date_time_now)
+    
+    verifier = Verifier(VERIFY_SAMPLE_RATE, VERIFY_TIME_BUDGET, executor=shared_executor()) if VERIFY_SAMPLE_RATE else None
+    # a failed job deletes the export instead of leaving it without its footer
+    with (WalletExportWriter(export_path) if export_path else contextlib.nullcontext()) as exporter:
+        qr_matrices = {}
+        pdf = new_pdf(seed_name, date_time_now)
+        add_seed_information_pages(pdf, seed_name, mnemonic, root_keys_table_data, xpub_keys_table_data)
+        add_derived_addresses_heading(pdf)
+    
+        for bip_type in derived_addresses_table_data:
+            pdf.ln(8)
+            pdf.set_font('helvetica','B',size=12)
+            pdf.cell(w=0, text=bip_type, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+            pdf.ln(2)
+            if exporter:
+                export_table(exporter, seed_name, xpub_keys, bip_type, derived_addresses_table_data[bip_type], date_time_now)
+            packed_matrices = add_derived_addresses_table(pdf, derived_addresses_table_data[bip_type])
+            if verifier:
+                submit_table_for_verification(verifier, mnemonic, bip_type, derived_addresses_table_data[bip_type], packed_matrices)
+            for data_row, packed in zip(derived_addresses_table_data[bip_type][1:], packed_matrices):
+                qr_matrices[data_row[2]] = packed
             # if no space left in the bottom, add a new page
             pdf.ln(8)
             
             if pdf.h - pdf.y < 30:
                 pdf.add_page()           
     
-    pdf.output(file_name)
+        # the PDF only gets its name once the verifier found no mismatch
+        with staged_output(file_name) as staged_name:
+            pdf.output(staged_name)
+            if verifier:
+                verifier.close()
+        if SIDECAR_DIR:
+            addresses = {bip_type: [data_row[1] for data_row in table_data[1:]]
+                         for bip_type, table_data in derived_addresses_table_data.items()}
+            save_sidecar(seed_bytes, seed_name, date_time_now, xpub_keys, addresses, qr_matrices)
+    return file_name
+
+
+def save_sidecar(seed_bytes, seed_name, date_time_now, xpub_keys, addresses, qr_matrices):
+    xpubs = {bip_type: xpub_keys[bip_type]['key'] for bip_type in xpub_keys}
+    for xpub in xpubs.values():
+        qr_matrices[xpub] = pack_matrix(qr_matrix(xpub))
+    path = write_sidecar(SIDECAR_DIR, get_master_fingerprint(seed_bytes), PDF_LAYOUT_VERSION,
+                         seed_name, date_time_now, xpubs, addresses, qr_matrices)
+    print(f"Public sidecar written to {path}")
+
+
+def render_address_book_chunk(job):
+    """
+        Worker process: derives one range of addresses from the account xpub and renders
+        them into a partial PDF. Only this chunk's QR codes are ever held in memory
+    """
+    bip_type, account_ext_pub_key, start, stop, seed_name, date_time_now, part_path, addresses, qr_matrices = job
+    # rendering from a sidecar hands in the addresses and packed QR matrices
+    if addresses is None:
+        addresses = derive_addresses_from_xpub(bip_type, account_ext_pub_key, start, stop)
+
+    table_data = [['No', 'Address', 'QR Code','Notes']]
+    for index, address in enumerate(addresses, start=start):
+        table_data.append([str(index+1), address, address, ''])
+
+    pdf = new_pdf(seed_name, date_time_now, merged_later=True)
+    pdf.add_page()
+    # the first chunk opens the section like the small book does, the others continue its table
+    if start == 0:
+        pdf.ln(8)
+        pdf.set_font('helvetica','B',size=12)
+        pdf.cell(w=0, text=bip_type, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(2)
+    pdf.set_font('helvetica',size=11)
+    packed_matrices = add_derived_addresses_table(pdf, table_data, qr_matrices)
+    pdf.output(part_path)
+    # the laid out rows go back to the main process for verification and the sidecar
+    return part_path, table_data, packed_matrices
+
+
+def address_book_jobs(xpub_keys, n_address_count, seed_name, date_time_now, temp_dir, sidecar=None):
+    # workers only get the account xpubs (or the public sidecar data), never the seed
+    jobs = []
+    for bip_type in xpub_keys:
+        for start in range(0, n_address_count, ADDRESS_BOOK_CHUNK_SIZE):
+            stop = min(start + ADDRESS_BOOK_CHUNK_SIZE, n_address_count)
+            part_path = os.path.join(temp_dir, f"{bip_type}_{start:08d}.pdf")
+            addresses = qr_matrices = None
+            if sidecar:
+                addresses = sidecar['addresses'][bip_type][start:stop]
+                qr_matrices = [sidecar['qr'][address] for address in addresses]
+            jobs.append((bip_type, xpub_keys[bip_type]['key'], start, stop, seed_name, date_time_now, part_path,
+                         addresses, qr_matrices))
+    return jobs
+
+
+def create_address_book_pdf(seed_name, mnemonic, n_address_count, file_name=None, export_path=EXPORT_PATH):
+    """
+        Large address book mode: the seed information pages are rendered here, the address
+        tables are split into chunks of ADDRESS_BOOK_CHUNK_SIZE rows that are derived and
+        rendered in worker processes (the pool shared by all jobs), then all partial
+        documents are merged page by page into one PDF (merge_parts)
+    """
+    seed_bytes = get_seed_bytes(mnemonic)
+    root_keys = derive_root_keys(seed_bytes)
+    xpub_keys = derive_extended_pub_keys(seed_bytes)
+
+    root_keys_table_data = create_root_keys_table_data(root_keys)
+    xpub_keys_table_data = create_xpub_keys_table_data(xpub_keys)
+
+    date_time_now = datetime.now()
+    if not file_name:
+        file_name = default_pdf_name(seed_name, date_time_now)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf = new_pdf(seed_name, date_time_now, merged_later=True)
+        add_seed_information_pages(pdf, seed_name, mnemonic, root_keys_table_data, xpub_keys_table_data)
+        add_derived_addresses_heading(pdf)
+        front_path = os.path.join(temp_dir, "front.pdf")
+        pdf.output(front_path)
+        del pdf
+
+        jobs = address_book_jobs(xpub_keys, n_address_count, seed_name, date_time_now, temp_dir)
+        addresses = {bip_type: [] for bip_type in xpub_keys}
+        qr_matrices = {}
+
+        part_paths = [front_path]
+        verifier = Verifier(VERIFY_SAMPLE_RATE, VERIFY_TIME_BUDGET, executor=shared_executor()) if VERIFY_SAMPLE_RATE else None
+        # a failed job deletes the export instead of leaving it without its footer
+        with (WalletExportWriter(export_path) if export_path else contextlib.nullcontext()) as exporter:
+            # map keeps the job order, so the parts are listed in document order
+            for job, (part_path, table_data, packed_matrices) in zip(jobs, shared_executor().map(render_address_book_chunk, jobs)):
+                if SIDECAR_DIR:
+                    addresses[job[0]].extend(data_row[1] for data_row in table_data[1:])
+                    qr_matrices.update(zip(addresses[job[0]][job[2]:job[3]], packed_matrices))
+                if verifier:
+                    submit_table_for_verification(verifier, mnemonic, job[0], table_data, packed_matrices)
+                if exporter:
+                    export_table(exporter, seed_name, xpub_keys, job[0], table_data, date_time_now)
+                part_paths.append(part_path)
+            with staged_output(file_name) as staged_name:
+                merge_parts(part_paths, staged_name, seed_name, date_time_now)
+                if verifier:
+                    verifier.close()
+            if SIDECAR_DIR:
+                save_sidecar(seed_bytes, seed_name, date_time_now, xpub_keys, addresses, qr_matrices)
+
+    return file_name
     
     
+def create_public_pdf(sidecar_file, file_name=None):
+    """
+        Rebuilds the public pages (xpubs and derived addresses) from a sidecar alone,
+        no mnemonic, seed or derivation is involved
+    """
+    sidecar = load_sidecar(sidecar_file, PDF_LAYOUT_VERSION)
+    if sidecar is None:
+        raise ValueError(f"{sidecar_file} was written for another layout version, create it again from the mnemonic")
+
+    seed_name = sidecar['seed_name']
+    date_time_now = sidecar['created']
+    xpub_keys = {bip_type: {'key': xpub, 'qr_code': matrix_to_image(unpack_matrix(sidecar['qr'][xpub]), box_size=5, border=2)}
+                 for bip_type, xpub in sidecar['xpubs'].items()}
+    n_address_count = len(next(iter(sidecar['addresses'].values())))
+
+    if not file_name:
+        file_name = default_pdf_name(seed_name, datetime.now(), public=True)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf = new_pdf(seed_name, date_time_now, merged_later=True)
+        pdf.add_page()
+        pdf.set_font('helvetica',size = 24)
+        pdf.cell(w=0, text='Public Wallet Information', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font('helvetica',size=14)
+        pdf.ln(4)
+        pdf.cell(w=0, text=f'Seed Name: {seed_name}', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.cell(w=0, text=f"Master Fingerprint: {sidecar['fingerprint']}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_font('helvetica','I',size=11)
+        pdf.cell(w=0, text=f"(generated on {pdf.now})", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        add_xpub_keys_page(pdf, create_xpub_keys_table_data(xpub_keys))
+        add_derived_addresses_heading(pdf)
+        front_path = os.path.join(temp_dir, "front.pdf")
+        pdf.output(front_path)
+        del pdf
+
+        jobs = address_book_jobs(xpub_keys, n_address_count, seed_name, date_time_now, temp_dir, sidecar)
+        part_paths = [front_path]
+        part_paths.extend(part_path for part_path, _, _ in shared_executor().map(render_address_book_chunk, jobs))
+        merge_parts(part_paths, file_name, seed_name, date_time_now)
+
+    print(f"Public pages written to {file_name}")
+    return file_name
+
+
+def run_job(job):
+    """
+        Runs one job (see JOB_FIELDS) and returns the path of its PDF
+    """
+    if job['from_sidecar']:
+        sidecar = load_sidecar(job['from_sidecar'], PDF_LAYOUT_VERSION)
+        seed_name = sidecar['seed_name'] if sidecar else ""
+        file_name = job['output'] or job_file_name(job, default_pdf_name(seed_name, datetime.now(), public=True))
+        check_new_target(job, file_name)
+        return create_public_pdf(job['from_sidecar'], file_name)
+    file_name = job['output'] or job_file_name(job, default_pdf_name(job['name'], datetime.now()))
+    check_new_target(job, file_name)
+    check_new_target(job, job['export'])
+    mnemonic = generate_mnemonic(128 if job['words'] == 12 else 256)
+    return create_pdf(job['name'], mnemonic, job['addresses'], file_name, job['export'])
+
 def main():
-    strength,seed_name = get_user_input()
+    # with a job spec or flags all jobs run without prompts, see wallet_jobs.py
+    jobs = parse_jobs(JOB_FIELDS, "Generate a BIP39 seed and print its keys and addresses to PDF.")
+    if jobs is not None:
+        sys.exit(1 if run_jobs(jobs, run_job) else 0)
+    strength,seed_name,n_address_count = get_user_input()
     mnemonic = generate_mnemonic(strength)
-    create_pdf(seed_name,mnemonic)
+    create_pdf(seed_name,mnemonic,n_address_count)
 
 if __name__ == "__main__":
     main()
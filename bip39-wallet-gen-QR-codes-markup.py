@@ -35,25 +35,30 @@ def setup_virtual_environment():
 setup_virtual_environment()
 
 from mnemonic import Mnemonic
-from bip_utils import Bip39SeedGenerator, Bip44, Bip49, Bip84, Bip44Coins, Bip49Coins, Bip84Coins, Bip44Changes
+from bip_utils import Bip44, Bip49, Bip84, Bip44Coins, Bip49Coins, Bip84Coins, Bip44Changes
+from wallet_seed import mnemonic_to_seed
 from datetime import datetime
-import qrcode
-import base64
-from io import BytesIO
+import contextlib
+from wallet_qr import qr_png_base64, image_to_png_base64
+from seedqr import mnemonic_qr_image, MNEMONIC_QR_LABELS
+from wallet_export import WalletExportWriter
+from wallet_jobs import parse_jobs, run_jobs, job_file_name, check_new_target
+
+# Public wallet data (xpubs, paths, addresses, time) is also written here in the wallet_export format, None disables it
+EXPORT_PATH = None
+# Mnemonic QR code content: 'words' (the word string), 'seedqr' or 'compact_seedqr' (see seedqr.py)
+MNEMONIC_QR_FORMAT = 'words'
+# Settings of one run, for job spec files and command line flags (see wallet_jobs.py)
+JOB_FIELDS = {
+    'words': (int, 24, "mnemonic length", (12, 24)),
+    'name': (str, "", "name of the seed", None),
+    'output': (str, None, "output .seed file", None),
+    'export': (str, EXPORT_PATH, "also write the public wallet data to this wallet_export file", None),
+}
 
 def generate_qr_code(data):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=5,  # Reduced from 10 to 5
-        border=2,    # Reduced from 4 to 2
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    img_buffer = BytesIO()
-    img.save(img_buffer, format='PNG')
-    return base64.b64encode(img_buffer.getvalue()).decode()
+    # wallet_qr pins version and mask for addresses and xpubs, box size 5 and border 2 as before
+    return qr_png_base64(data, box_size=5, border=2)
 
 
 def get_user_input():
@@ -67,12 +72,21 @@ def generate_mnemonic(strength):
     return mnemo.generate(strength=strength)
 
 
-def derive_keys_and_write_to_file(mnemonic, seed_name):
-    seed_bytes = Bip39SeedGenerator(mnemonic).Generate()
-    date_time_now = datetime.now().strftime("%d%m%Y_%H%M")
-    file_name = f"{seed_name}_{date_time_now}.seed" if seed_name else f"{date_time_now}.seed"
+def default_file_name(seed_name, created):
+    date_time_now = created.strftime("%d%m%Y_%H%M")
+    return f"{seed_name}_{date_time_now}.seed" if seed_name else f"{date_time_now}.seed"
 
-    with open(file_name, "w") as file:
+
+def derive_keys_and_write_to_file(mnemonic, seed_name, file_name=None, export_path=EXPORT_PATH):
+    seed_bytes = mnemonic_to_seed(mnemonic)
+    created = datetime.now()
+    date_time_now = created.strftime("%d%m%Y_%H%M")
+    account_ext_pub_keys = {}
+    if not file_name:
+        file_name = default_file_name(seed_name, created)
+
+    # a failed run deletes the export instead of leaving it without its footer
+    with open(file_name, "w") as file, (WalletExportWriter(export_path) if export_path else contextlib.nullcontext()) as exporter:
         file.write(f"# Seed Information - Generated on {date_time_now}\n")
         if seed_name:
             file.write(f"## Seed Name: {seed_name}\n\n")
@@ -82,8 +96,8 @@ def derive_keys_and_write_to_file(mnemonic, seed_name):
         for i, word in enumerate(mnemonic_words, start=1):
             file.write(f"{i}. {word}\n")
 
-        mnemonic_qr = generate_qr_code(mnemonic)
-        file.write("\n### Mnemonic QR Code:\n")
+        mnemonic_qr = image_to_png_base64(mnemonic_qr_image(mnemonic, MNEMONIC_QR_FORMAT, box_size=5, border=2))
+        file.write(f"\n### Mnemonic QR Code{MNEMONIC_QR_LABELS[MNEMONIC_QR_FORMAT]}:\n")
         file.write(f"![](data:image/png;base64,{mnemonic_qr})\n\n")
         file.write("| BIP Type | Description | Root Key |\n")
         file.write("|----------|-------------|----------|\n")
@@ -107,6 +121,7 @@ def derive_keys_and_write_to_file(mnemonic, seed_name):
         for bip_type, bip_cls, coin_type in [('BIP44', Bip44, Bip44Coins.BITCOIN), ('BIP49', Bip49, Bip49Coins.BITCOIN), ('BIP84', Bip84, Bip84Coins.BITCOIN)]:
             bip_obj = bip_cls.FromSeed(seed_bytes, coin_type)
             account_ext_pub_key = bip_obj.Purpose().Coin().Account(0).PublicKey().ToExtended()
+            account_ext_pub_keys[bip_type] = account_ext_pub_key
             account_ext_pub_key_qr = generate_qr_code(account_ext_pub_key)
             file.write(f"| {bip_type} | {account_ext_pub_key} | ![](data:image/png;base64,{account_ext_pub_key_qr}) |  |\n")
 
@@ -121,10 +136,24 @@ def derive_keys_and_write_to_file(mnemonic, seed_name):
                 address = bip_obj.Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT).AddressIndex(i).PublicKey().ToAddress()
                 address_qr_code = generate_qr_code(address)
                 file.write(f"| {bip_type} | {i} | {address} | ![](data:image/png;base64,{address_qr_code}) |  |\n")
+                if exporter:
+                    exporter.add(seed_name, account_ext_pub_keys[bip_type], f"m/{bip_type[3:]}'/0'/0'/0/{i}", address, created)
 
     print(f"Seed information written to {file_name}")
+    return file_name
+
+def run_job(job):
+    file_name = job['output'] or job_file_name(job, default_file_name(job['name'], datetime.now()))
+    check_new_target(job, file_name)
+    check_new_target(job, job['export'])
+    mnemonic = generate_mnemonic(128 if job['words'] == 12 else 256)
+    return derive_keys_and_write_to_file(mnemonic, job['name'], file_name, job['export'])
 
 def main():
+    # with a job spec or flags all jobs run without prompts, see wallet_jobs.py
+    jobs = parse_jobs(JOB_FIELDS, "Generate a BIP39 seed and write its keys and addresses as markup.")
+    if jobs is not None:
+        sys.exit(1 if run_jobs(jobs, run_job) else 0)
     strength, seed_name = get_user_input()
     mnemonic = generate_mnemonic(strength)
     derive_keys_and_write_to_file(mnemonic, seed_name)
@@ -0,0 +1,281 @@
+import os
+import secrets
+import contextlib
+import itertools
+from datetime import datetime
+from mnemonic import Mnemonic
+from bip_utils import Bip84, Bip84Coins, Bip44Changes
+from wallet_html_shards import ShardWriter
+from wallet_verify import Verifier, staged_output
+from wallet_export import WalletExportWriter
+from streaming_pdf import StreamingPDF
+from card_raster import CardRasterWriter, RASTER_FORMATS, FILE_EXTENSIONS
+from wallet_guard import WalletGuard
+from wallet_jobs import shared_executor, shared_pool_size, job_file_name, check_new_target
+from wallet_tuning import TunedMap
+from wallet_record import WalletRecord
+from wallet_seed import mnemonic_to_seed
+
+# Bulk card pipeline shared by the card generators (generate_business_card_wallets.py and
+# generate_12_word_wallets.py).
+#
+# Generation (entropy, guard, seed stretching, derivation), verification, export and the
+# output writers (HTML, sharded HTML, streaming PDF, printer languages) are the same for
+# every kind of card. A script describes its cards with a CardLayout (geometry plus its
+# HTML and PDF card layouts) and lists the sections of a job as (word count, number of
+# wallets) pairs, e.g. ((24, 10), (12, 5)); run_card_job() does the rest.
+
+
+class CardLayout:
+    """
+    One kind of card:
+
+      name                base name of the default outputs, e.g. "business_card_wallets"
+      width, height       card size in mm (streaming PDF and printer languages)
+      per_row, rows       cards per row and rows per streaming PDF page
+      raster_columns      words per line on printer language cards
+      html_per_page       wallets per printed HTML page, shards are aligned to pages
+      render_html(title, sections) yields the HTML text page by page, sections is a sequence
+                          of (section title, WalletRecords) pairs in print order
+      draw_card(pdf, x, y, record) draws one card on a streaming_pdf.StreamingPDF page
+    """
+
+    def __init__(self, name, width, height, per_row, rows, raster_columns, html_per_page, render_html, draw_card):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.per_row = per_row
+        self.rows = rows
+        self.raster_columns = raster_columns
+        self.html_per_page = html_per_page
+        self.render_html = render_html
+        self.draw_card = draw_card
+
+
+def derive_first_address(seed_bytes):
+    """
+    Returns the first Native SegWit (BIP84) address of a BIP39 seed, its derivation path
+    and the account extended public key.
+    """
+    bip84_mst = Bip84.FromSeed(seed_bytes, Bip84Coins.BITCOIN)
+    bip84_acc = bip84_mst.Purpose().Coin().Account(0)
+    # Get the change object
+    bip84_change = bip84_acc.Change(Bip44Changes.CHAIN_EXT)
+
+    # Derive the address at index 0
+    bip84_addr_idx = bip84_change.AddressIndex(0)
+    address = bip84_addr_idx.PublicKey().ToAddress()
+
+    # Manually construct the derivation path string for the first address
+    derivation_path = "m/84'/0'/0'/0/0"
+    return address, derivation_path, bip84_acc.PublicKey().ToExtended()
+
+
+def generate_wallet_job(job):
+    """
+    Pool side of generate_wallets: (WalletRecord, account xpub) of one wallet from (seed
+    phrase, creation time text). The seed is stretched here, so it never leaves the worker.
+    """
+    seed_phrase, created = job
+    address, derivation_path, account_ext_pub_key = derive_first_address(mnemonic_to_seed(seed_phrase))
+    return WalletRecord.from_words(seed_phrase.split(), address, derivation_path, created), account_ext_pub_key
+
+
+def generate_wallets(word_count, num_wallets, created, guard=None):
+    """
+    Yields (WalletRecord, account xpub) of num_wallets wallets, in order. The entropy is
+    drawn and the guard is fed here in this process, so the RNG health tests and the
+    duplicate check see every wallet. Seed stretching and derivation run together in the
+    shared pool (see wallet_jobs.py), with the number of parallel tasks, chunk size and
+    queue depth tuned while running (see wallet_tuning.py).
+    """
+    if word_count not in [12, 24]:
+        raise ValueError("Word count must be 12 or 24")
+    mnemo = Mnemonic("english")
+    n_bytes = 16 if word_count == 12 else 32
+    jobs = ((mnemo.to_mnemonic(guard.entropy(n_bytes) if guard else secrets.token_bytes(n_bytes)), created)
+            for _ in range(num_wallets))
+    tuner = TunedMap(f"{word_count}-word wallets", generate_wallet_job, shared_executor, shared_pool_size())
+    for record, account_ext_pub_key in tuner.map(jobs):
+        if guard:
+            guard.add_wallet(" ".join(record.words()), record.address)
+        yield record, account_ext_pub_key
+    if num_wallets:
+        print(tuner.report())
+
+
+def section_wallets(title, sections, created, exporter=None, guard=None):
+    """
+    Yields (word count, WalletRecord) of every wallet of every section, in order, and
+    writes the public data of each to the exporter.
+    """
+    now = created.strftime("%Y-%m-%d %H:%M:%S")
+    for word_count, num_wallets in sections:
+        for record, account_ext_pub_key in generate_wallets(word_count, num_wallets, now, guard=guard):
+            if exporter:
+                exporter.add(title, account_ext_pub_key, record.path, record.address, created)
+            yield word_count, record
+
+
+def write_sharded_output(layout, title, sections, created, wallets_per_file, out_dir, exporter=None, verifier=None, guard=None):
+    """
+    Writes the wallets into numbered HTML files of wallets_per_file wallets each, plus an
+    index page and a print manifest per file. Files are written in the background as soon
+    as they are full, so the whole printout is never held in memory. Returns the file
+    name of the index.
+    """
+
+    def render_shard(shard_title, shard_sections):
+        html_content = "".join(layout.render_html(shard_title, shard_sections.items()))
+        # the rendered cards are re-checked while the next shards are generated
+        if verifier:
+            verifier.submit_html(html_content, expected=sum(len(wallets) for wallets in shard_sections.values()))
+        return html_content
+
+    writer = ShardWriter(out_dir, layout.name, title, render_shard,
+                         wallets_per_file, wallets_per_page=layout.html_per_page)
+    for word_count, record in section_wallets(title, sections, created, exporter, guard):
+        writer.add(f'{word_count}-word', record)
+
+    return os.path.basename(writer.close())
+
+
+def write_streaming_pdf_output(layout, title, sections, created, filename, exporter=None, verifier=None, guard=None):
+    """
+    Writes all wallets as cards into one PDF that is streamed to disk page by page, so
+    memory stays flat however many cards are printed. QR codes go in as 1 bit images
+    straight from the QR matrix, no PNG encoding.
+    """
+    now = created.strftime("%Y-%m-%d %H:%M:%S")
+    pdf = StreamingPDF(filename)
+    cards_per_page = layout.per_row * layout.rows
+    margin_x = (pdf.page_width - layout.per_row * layout.width) / (layout.per_row + 1)
+
+    current_section, n = None, 0
+    for word_count, record in section_wallets(title, sections, created, exporter, guard):
+        if word_count != current_section:
+            # every section starts on a new page
+            current_section, n = word_count, 0
+        if n % cards_per_page == 0:
+            pdf.add_page()
+            pdf.text(margin_x, 12, f"{title} - {word_count}-Word Seed Phrases", size=12, style='B')
+            pdf.text(margin_x, pdf.page_height - 8, f"Page {pdf.page_no()}   {title} ({now})", size=7)
+        slot = n % cards_per_page
+        x = margin_x + (slot % layout.per_row) * (layout.width + margin_x)
+        y = 18 + (slot // layout.per_row) * (layout.height + 5)
+        layout.draw_card(pdf, x, y, record)
+        if verifier:
+            verifier.submit(record.words(), record.address, record.path, qr=record.qr)
+        n += 1
+
+    pdf.close()
+
+
+def write_raster_output(layout, title, sections, created, raster_format, target, exporter=None, verifier=None, guard=None):
+    """
+    Writes every card in a printer language (see card_raster.py) as soon as it is generated,
+    to one stream file or, if target is a directory, one file per card for a print spooler.
+    Returns the number of cards.
+    """
+    writer = CardRasterWriter(target, raster_format, layout.width, layout.height, columns=layout.raster_columns)
+
+    for word_count, record in section_wallets(title, sections, created, exporter, guard):
+        seed_phrase = record.words()
+        writer.add(f"{title} - {word_count}-Word Seed Phrase", seed_phrase, record.address, record.path, record.created, record.modules())
+        if verifier:
+            verifier.submit(seed_phrase, record.address, record.path, qr=record.qr)
+
+    return writer.close()
+
+
+def write_html_output(layout, title, sections, created, filename, exporter=None, verifier=None, guard=None):
+    """
+    Writes all wallets into one HTML file. Every page is written as soon as its wallets
+    are generated, so only one page is held in memory. The verifier must find as many
+    cards in the pages as were generated.
+    """
+    rendered = found = 0
+
+    def counted_wallets():
+        nonlocal rendered
+        for word_count, record in section_wallets(title, sections, created, exporter, guard):
+            rendered += 1
+            yield word_count, record
+
+    grouped = ((f'{word_count}-word', (record for _, record in section))
+               for word_count, section in itertools.groupby(counted_wallets(), key=lambda item: item[0]))
+    with open(filename, "w") as f:
+        for html_content in layout.render_html(title, grouped):
+            if verifier:
+                found += verifier.submit_html(html_content)
+            f.write(html_content)
+    if verifier and found != rendered:
+        raise ValueError(f"Found {found} wallet cards in the rendered HTML, {rendered} were rendered")
+
+
+def run_card_job(layout, job, sections, verify_sample_rate=1.0, verify_time_budget=None):
+    """
+    Runs one card job (the JOB_FIELDS of the card scripts) for the given sections and
+    returns the path of its output. The printed cards are re-derived by a Verifier with
+    verify_sample_rate and verify_time_budget (a sample rate of 0 disables it). The output
+    is written under a temporary name and renamed once the verifier and the guard are
+    closed without error, except for a spool directory, whose cards are printed as they come.
+    """
+    created = datetime.now()
+    title = job['title']
+    if job['format'] in RASTER_FORMATS:
+        target = job['output'] or job_file_name(job, layout.name + FILE_EXTENSIONS[job['format']])
+    elif job['format'] == "pdf":
+        target = job['output'] or job_file_name(job, layout.name + ".pdf")
+    elif job['wallets_per_file']:
+        target = job['output'] or job_file_name(job, layout.name)
+    else:
+        target = job['output'] or job_file_name(job, layout.name + ".html")
+    spooled = job['format'] in RASTER_FORMATS and os.path.isdir(target)
+    sharded = job['format'] == "html" and bool(job['wallets_per_file'])
+    if not spooled:
+        check_new_target(job, target)
+    check_new_target(job, job['export'])
+
+    exporter = guard = None
+    try:
+        exporter = WalletExportWriter(job['export']) if job['export'] else None
+        guard = WalletGuard(job['guard']) if job['guard'] else None
+        verifier = Verifier(verify_sample_rate, verify_time_budget, executor=shared_executor()) if verify_sample_rate else None
+        with (contextlib.nullcontext(target) if spooled else staged_output(target, directory=sharded)) as staged:
+            if job['format'] in RASTER_FORMATS:
+                result = write_raster_output(layout, title, sections, created, job['format'], staged, exporter, verifier, guard)
+            elif job['format'] == "pdf":
+                result = write_streaming_pdf_output(layout, title, sections, created, staged, exporter, verifier, guard)
+            elif sharded:
+                result = write_sharded_output(layout, title, sections, created, job['wallets_per_file'], staged,
+                                              exporter, verifier, guard)
+            else:
+                result = write_html_output(layout, title, sections, created, staged, exporter, verifier, guard)
+            if verifier:
+                verifier.close()
+            if guard:
+                guard.close()
+        if exporter:
+            exporter.close()
+    except BaseException:
+        # a failed job leaves neither a truncated export nor run files in the guard store
+        if exporter:
+            exporter.abort()
+        if guard:
+            guard.abort()
+        raise
+
+    if job['format'] in RASTER_FORMATS:
+        print(f"Successfully generated {result} {job['format'].upper()} cards in '{target}'")
+        return target
+    print(f"Successfully generated wallets in '{target}'")
+    if job['format'] == "pdf":
+        return target
+    if job['wallets_per_file']:
+        index_path = os.path.join(target, result)
+        print(f"To print the wallets, open the index in your browser: file://{os.path.abspath(index_path)}")
+        return index_path
+    # Provide instruction to open the file
+    print(f"To view the wallets, open this file in your browser: file://{os.path.abspath(target)}")
+    return target
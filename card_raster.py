@@ -0,0 +1,225 @@
+import os
+from PIL import Image, ImageDraw, ImageFont
+
+# Printer-native card output, no HTML, PNG or PDF in between.
+#
+#   zpl  Zebra thermal printers: text as native ^A0 fields, the QR code as a compressed ^GFA
+#        graphic drawn from the QR matrix (so the printed code is exactly the one encoded)
+#   pbm  1-bit raster, one binary P4 image per card (multi-image PBM when written to a file)
+#   pcl  1-bit raster pages for PCL 5 printers, blank rows are skipped with a y offset
+#
+# Cards are written one by one as they come, either appended to one stream file or, when
+# the target is a directory, each into its own file in that spool directory. Spool files
+# are written under a temporary name and renamed, a spooler never picks up half a card.
+#
+# Layout (in mm, converted to dots at the printer resolution): title, the numbered words
+# in columns, then the QR code with path, address and creation time next to or below it.
+
+RASTER_FORMATS = ('zpl', 'pbm', 'pcl')
+FILE_EXTENSIONS = {'zpl': '.zpl', 'pbm': '.pbm', 'pcl': '.pcl'}
+
+# Thermal label printers are usually 203 dpi, office printers 300 dpi
+DEFAULT_DPI = {'zpl': 203, 'pbm': 203, 'pcl': 300}
+
+MARGIN_MM = 3
+TITLE_MM = 3.2
+WORD_MM = 2.6
+SMALL_MM = 2.0
+
+INVERT = bytes(255 - value for value in range(256))
+
+
+def _escape_zpl(text):
+    # used with ^FH: _ starts a hex escape, ^ and ~ are command prefixes
+    return text.replace("_", "_5F").replace("^", "_5E").replace("~", "_7E")
+
+
+def _zpl_run(char, count):
+    # ZPL ASCII compression: G..Y repeat 1..19 times, g..z repeat 20..400 times
+    out = ""
+    while count > 400:
+        out += "z"
+        count -= 400
+    if count >= 20:
+        out += chr(ord("g") + count // 20 - 1)
+    if count % 20:
+        out += chr(ord("G") + count % 20 - 1)
+    return out + char
+
+
+def _zpl_compress(rows):
+    """^GFA data in ZPL ASCII compression, a row equal to the one above is just ':'."""
+    out = []
+    previous = None
+    for row in rows:
+        if row == previous:
+            out.append(":")
+            continue
+        previous = row
+        hex_row = row.hex().upper()
+        compressed = []
+        i = 0
+        while i < len(hex_row):
+            j = i
+            while j < len(hex_row) and hex_row[j] == hex_row[i]:
+                j += 1
+            compressed.append(_zpl_run(hex_row[i], j - i) if j - i > 2 else hex_row[i:j])
+            i = j
+        out.append("".join(compressed))
+    return "".join(out)
+
+
+def _qr_bitmap(modules, scale):
+    """QR matrix as 1-bit rows (1 = black), each module scale x scale dots."""
+    width = len(modules) * scale
+    rows = []
+    for row in modules:
+        bits = "".join(("1" if module else "0") * scale for module in row).ljust((width + 7) // 8 * 8, "0")
+        packed = int(bits, 2).to_bytes(len(bits) // 8, "big")
+        rows.extend([packed] * scale)
+    return rows, (width + 7) // 8
+
+
+class CardRasterWriter:
+    """
+    add() renders one card and writes it out right away. target is a file (all cards in
+    one stream) or an existing directory (one file per card).
+    """
+
+    def __init__(self, target, raster_format, card_width_mm, card_height_mm, dpi=None, columns=3):
+        if raster_format not in RASTER_FORMATS:
+            raise ValueError(f"Unknown raster format: {raster_format}, expected one of {', '.join(RASTER_FORMATS)}")
+        self.format = raster_format
+        self.dpi = dpi or DEFAULT_DPI[raster_format]
+        # raster rows are whole bytes, so the width is rounded down to 8 dots
+        self.width = self.dots(card_width_mm) // 8 * 8
+        self.height = self.dots(card_height_mm)
+        self.columns = columns
+        self.spool_dir = target if os.path.isdir(target) else None
+        self.file = None if self.spool_dir else open(target, "wb")
+        self.count = 0
+        self.fonts = {}
+        if self.file and raster_format == 'pcl':
+            self.file.write(b"\x1bE")
+
+    def dots(self, mm):
+        return round(mm * self.dpi / 25.4)
+
+    def font(self, size):
+        if size not in self.fonts:
+            self.fonts[size] = ImageFont.load_default(size=size)
+        return self.fonts[size]
+
+    def layout(self, title, words, address, path, created, modules):
+        """
+        The card as a list of ('text', x, y, height, text) and one ('qr', x, y, scale)
+        with positions in dots, shared by the ZPL and the raster renderers.
+        """
+        margin = self.dots(MARGIN_MM)
+        word_height = self.dots(WORD_MM)
+        small = self.dots(SMALL_MM)
+        line_height = word_height * 5 // 4
+        column_width = (self.width - 2 * margin) // self.columns
+        items = [('text', margin, margin, self.dots(TITLE_MM), title)]
+
+        top = margin + self.dots(TITLE_MM) * 3 // 2
+        for i, word in enumerate(words):
+            x = margin + (i % self.columns) * column_width
+            items.append(('text', x, top + (i // self.columns) * line_height, word_height, f"{i+1}. {word}"))
+
+        qr_top = top + (len(words) + self.columns - 1) // self.columns * line_height + line_height // 2
+        # the QR code gets one module of extra quiet zone on top of the margin. The text goes
+        # next to it on wide cards and below it when the space left is taller than wide
+        free_width = self.width - 2 * margin
+        free_height = self.height - margin - qr_top
+        texts = (f"Path (BIP84): {path}", address, f"Created: {created}")
+        if free_height > free_width:
+            scale = max(1, min(free_width, free_height - len(texts) * small * 2) // (len(modules) + 2))
+            text_x, text_y = margin, qr_top + (len(modules) + 2) * scale
+        else:
+            scale = max(1, min(free_width // 2, free_height) // (len(modules) + 2))
+            text_x, text_y = margin * 2 + (len(modules) + 2) * scale, qr_top
+        items.append(('qr', margin + scale, qr_top + scale, scale))
+        for n, text in enumerate(texts):
+            items.append(('text', text_x, text_y + n * small * 2, small, text))
+        return items
+
+    def _zpl(self, items, modules):
+        out = [f"^XA^CI28^PW{self.width}^LL{self.height}"]
+        for item in items:
+            if item[0] == 'text':
+                _, x, y, height, text = item
+                out.append(f"^FO{x},{y}^A0N,{height},{height}^FH^FD{_escape_zpl(text)}^FS")
+            else:
+                _, x, y, scale = item
+                rows, bytes_per_row = _qr_bitmap(modules, scale)
+                total = len(rows) * bytes_per_row
+                out.append(f"^FO{x},{y}^GFA,{total},{total},{bytes_per_row},{_zpl_compress(rows)}^FS")
+        out.append("^XZ\n")
+        return "\n".join(out).encode()
+
+    def _raster(self, items, modules):
+        """1-bit rows of the card, 1 = black."""
+        img = Image.new("1", (self.width, self.height), 1)
+        draw = ImageDraw.Draw(img)
+        for item in items:
+            if item[0] == 'text':
+                _, x, y, height, text = item
+                draw.text((x, y), text, font=self.font(height), fill=0)
+            else:
+                _, x, y, scale = item
+                for row_index, row in enumerate(modules):
+                    for column_index, module in enumerate(row):
+                        if module:
+                            left, top = x + column_index * scale, y + row_index * scale
+                            draw.rectangle((left, top, left + scale - 1, top + scale - 1), fill=0)
+        # PIL packs '1' images with 1 = white, printers want 1 = black
+        return img.tobytes().translate(INVERT)
+
+    def _pbm(self, data):
+        return f"P4\n{self.width} {self.height}\n".encode() + data
+
+    def _pcl(self, data):
+        bytes_per_row = self.width // 8
+        out = [f"\x1b*t{self.dpi}R\x1b*r{self.width}S\x1b*r1A".encode()]
+        blank = bytes(bytes_per_row)
+        skipped = 0
+        for start in range(0, len(data), bytes_per_row):
+            row = data[start:start + bytes_per_row]
+            if row == blank:
+                skipped += 1
+                continue
+            if skipped:
+                out.append(f"\x1b*b{skipped}Y".encode())
+                skipped = 0
+            out.append(f"\x1b*b{bytes_per_row}W".encode() + row)
+        out.append(b"\x1b*rB\x0c")
+        return b"".join(out)
+
+    def add(self, title, words, address, path, created, modules):
+        """Renders one card from its words, address, path, creation text and QR matrix."""
+        items = self.layout(title, words, address, path, created, modules)
+        if self.format == 'zpl':
+            card = self._zpl(items, modules)
+        elif self.format == 'pbm':
+            card = self._pbm(self._raster(items, modules))
+        else:
+            card = self._pcl(self._raster(items, modules))
+        self.count += 1
+        if self.spool_dir:
+            path = os.path.join(self.spool_dir, f"card_{self.count:06d}{FILE_EXTENSIONS[self.format]}")
+            with open(path + ".tmp", "wb") as f:
+                if self.format == 'pcl':
+                    f.write(b"\x1bE" + card + b"\x1bE")
+                else:
+                    f.write(card)
+            os.replace(path + ".tmp", path)
+        else:
+            self.file.write(card)
+
+    def close(self):
+        if self.file:
+            if self.format == 'pcl':
+                self.file.write(b"\x1bE")
+            self.file.close()
+        return self.count
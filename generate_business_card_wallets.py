@@ -1,15 +1,38 @@
 import os
 import sys
 import subprocess
-import qrcode
-import base64
-from io import BytesIO
-from datetime import datetime
-from mnemonic import Mnemonic
-from bip_utils import Bip39SeedGenerator, Bip84, Bip84Coins, Bip44Changes
+import itertools
+from wallet_jobs import parse_jobs, build_job, run_jobs
+from card_raster import RASTER_FORMATS
+from card_pipeline import CardLayout, run_card_job
 
 VENV_DIR = "venv_paper_wallet"
 
+# Every printed card is re-derived from its printed words by wallet_verify in worker processes.
+# Fraction of cards to check (0 disables verification) and optional time budget in seconds
+VERIFY_SAMPLE_RATE = 1.0
+VERIFY_TIME_BUDGET = None
+# Public wallet data (xpub, path, address, time) is also written here in the wallet_export format, None disables it
+EXPORT_PATH = None
+# Fingerprints of every mnemonic and address are kept here and checked for duplicates across
+# runs, and the entropy of every mnemonic goes through RNG health tests (see wallet_guard.py).
+# None disables both
+GUARD_DIR = None
+# Streaming PDF card layout (mm): 100 x 70 mm cards, 2 per row and 3 rows per A4 page
+CARD_WIDTH, CARD_HEIGHT = 100, 70
+CARDS_PER_ROW, CARD_ROWS = 2, 3
+# Settings of one run, for job spec files and command line flags (see wallet_jobs.py)
+JOB_FIELDS = {
+    'title': (str, "Bitcoin Paper Wallets", "title of the printout", None),
+    'wallets_24': (int, 0, "number of 24-word wallets", None),
+    'wallets_12': (int, 0, "number of 12-word wallets", None),
+    'format': (str, "html", "output format, zpl/pbm/pcl go straight to the printer", ("html", "pdf") + RASTER_FORMATS),
+    'wallets_per_file': (int, None, "split the HTML output into files of this many wallets", None),
+    'output': (str, None, "output file, or output directory with wallets_per_file (or spool directory for zpl/pbm/pcl)", None),
+    'export': (str, EXPORT_PATH, "also write the public wallet data to this wallet_export file", None),
+    'guard': (str, GUARD_DIR, "duplicate and RNG health check store directory", None),
+}
+
 def setup_virtual_env():
     """Create a virtual environment and install dependencies."""
     if not os.path.exists(VENV_DIR):
@@ -24,56 +47,18 @@ def setup_virtual_env():
     for dependency in dependencies:
         subprocess.check_call([pip_executable, "install", dependency])
 
-def generate_seed_phrase_and_address(word_count):
+def generate_html_output(title, sections):
     """
-    Generates a BIP39 seed phrase, the first Native SegWit (BIP84) address, and a QR code for the address.
+    Yields the HTML to display the wallets for printing piece by piece: the head, one piece
+    per printed page and the end. sections is a sequence of (section title, wallets) pairs
+    in print order, e.g. (('24-word', [WalletRecord]), ('12-word', [WalletRecord])), and
+    the wallets can come from a generator, so a printout is never held in memory whole.
     """
-    if word_count not in [12, 24]:
-        raise ValueError("Word count must be 12 or 24")
-
-    strength = 128 if word_count == 12 else 256
-    mnemo = Mnemonic("english")
-    seed_phrase = mnemo.generate(strength=strength)
-    
-    seed_bytes = Bip39SeedGenerator(seed_phrase).Generate()
-    
-    bip84_mst = Bip84.FromSeed(seed_bytes, Bip84Coins.BITCOIN)
-    bip84_acc = bip84_mst.Purpose().Coin().Account(0)
-    # Get the change object
-    bip84_change = bip84_acc.Change(Bip44Changes.CHAIN_EXT)
-    
-    # Derive the address at index 0
-    bip84_addr_idx = bip84_change.AddressIndex(0)
-    address = bip84_addr_idx.PublicKey().ToAddress()
-
-    # Manually construct the derivation path string for the first address
-    derivation_path = "m/84'/0'/0'/0/0"
-
-    # Generate QR code
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=4,
-        border=2,
-    )
-    qr.add_data(address)
-    qr.make(fit=True)
-    
-    img = qr.make_image(fill_color="black", back_color="white")
     
-    buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    
-    return seed_phrase.split(), address, img_str, derivation_path
-
-def generate_html_output(title, wallets_24_words, wallets_12_words):
-    """
-    Generates an HTML string to display the wallets for printing.
-    """
-    
-    def get_wallet_html(wallet_data):
-        seed_phrase, address, qr_code, derivation_path, timestamp = wallet_data
+    def get_wallet_html(record):
+        # words and QR image are expanded from the record only here
+        seed_phrase, address, derivation_path, timestamp = record.words(), record.address, record.path, record.created
+        qr_code = record.qr_png_base64(box_size=4, border=2)
         
         words_html = "".join([f"<div class='word'><span>{i+1}.</span> {word}</div>" for i, word in enumerate(seed_phrase)])
         
@@ -93,16 +78,15 @@ def generate_html_output(title, wallets_24_words, wallets_12_words):
         </div>
         """
         
-    def generate_page(wallets, page_title, wallets_per_page):
-        wallet_html_parts = [get_wallet_html(wallet) for wallet in wallets]
-        
-        pages_html = ""
+    def generate_pages(wallets, page_title, wallets_per_page):
+        wallets = iter(wallets)
         # Arrange wallets in a grid
-        pages_html = ""
-        for i in range(0, len(wallet_html_parts), 4): # 4 wallets per page
-            page_wallets = wallet_html_parts[i:i+4]
+        while True:
+            page_wallets = [get_wallet_html(wallet) for wallet in itertools.islice(wallets, wallets_per_page)]
+            if not page_wallets:
+                break
             
-            pages_html += f'''
+            yield f'''
             <div class="page">
                 <h2 class="page-title">{page_title}</h2>
                 <div class="wallet-grid">
@@ -110,10 +94,8 @@ def generate_html_output(title, wallets_24_words, wallets_12_words):
                 </div>
             </div>
             '''
-        return pages_html
         
-    html_24 = generate_page(wallets_24_words, "24-Word Seed Phrases", 4)
-    html_12 = generate_page(wallets_12_words, "12-Word Seed Phrases", 4)
+    page_titles = {'24-word': "24-Word Seed Phrases", '12-word': "12-Word Seed Phrases"}
 
     html = f"""
     <!DOCTYPE html>
@@ -148,42 +130,55 @@ def generate_html_output(title, wallets_24_words, wallets_12_words):
     </head>
     <body>
         <h1>{title}</h1>
-        {html_24}
-        {html_12}
+    """
+    yield html
+    for section_title, wallets in sections:
+        yield from generate_pages(wallets, page_titles[section_title], 4) # 4 wallets per page
+    yield """
     </body>
     </html>
     """
-    
-    return html
+
+def draw_wallet_card(pdf, x, y, record):
+    """
+    Draws one wallet card at (x, y) on a streaming PDF page, the PDF counterpart of get_wallet_html.
+    """
+    seed_phrase, address, derivation_path, timestamp = record.words(), record.address, record.path, record.created
+    pdf.rect(x, y, CARD_WIDTH, CARD_HEIGHT)
+    pdf.text(x + 35, y + 5, "Bitcoin Paper Wallet", size=8, style='B')
+    for i, word in enumerate(seed_phrase):
+        # three words per line, like the HTML grid
+        pdf.text(x + 3 + (i % 3) * 32, y + 10 + (i // 3) * 3.2, f"{i+1}. {word}", size=6.5)
+    line_y = y + 11 + (len(seed_phrase) + 2) // 3 * 3.2
+    pdf.line(x + 2, line_y, x + CARD_WIDTH - 2, line_y)
+    pdf.qr(record.modules(), x + 3, line_y + 2, 22)
+    pdf.text(x + 28, line_y + 5, f"Derivation Path (BIP84): {derivation_path}", size=5)
+    pdf.text(x + 28, line_y + 11, address, size=6, style='B')
+    pdf.text(x + 28, line_y + 17, f"BIP39 Standard Wallet - {timestamp[:4]}", size=5)
+    pdf.text(x + 28, line_y + 21, f"Created: {timestamp}", size=5)
+
+LAYOUT = CardLayout("business_card_wallets", CARD_WIDTH, CARD_HEIGHT, CARDS_PER_ROW, CARD_ROWS, raster_columns=3,
+                    html_per_page=4, render_html=generate_html_output, draw_card=draw_wallet_card)
+
+def run_job(job):
+    """
+    Runs one job (see JOB_FIELDS) and returns the path of its output.
+    """
+    return run_card_job(LAYOUT, job, ((24, job['wallets_24']), (12, job['wallets_12'])), VERIFY_SAMPLE_RATE, VERIFY_TIME_BUDGET)
 
 def main_script():
+    # with a job spec or flags all jobs run without prompts, see wallet_jobs.py
+    jobs = parse_jobs(JOB_FIELDS, "Generate printable BIP39 business card wallets.")
+    if jobs is not None:
+        sys.exit(1 if run_jobs(jobs, run_job) else 0)
+
     title = input("Enter a title for the printout: ")
     num_wallets_24 = int(input("Enter number of 24-word wallets to generate: "))
     num_wallets_12 = int(input("Enter number of 12-word wallets to generate: "))
-    
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-    # Generate 24-word wallets
-    wallets_24_words = []
-    for _ in range(num_wallets_24):
-        seed_phrase, address, qr_code, derivation_path = generate_seed_phrase_and_address(24)
-        wallets_24_words.append((seed_phrase, address, qr_code, derivation_path, now))
-    
-    # Generate 12-word wallets
-    wallets_12_words = []
-    for _ in range(num_wallets_12):
-        seed_phrase, address, qr_code, derivation_path = generate_seed_phrase_and_address(12)
-        wallets_12_words.append((seed_phrase, address, qr_code, derivation_path, now))
-
-    html_content = generate_html_output(title, wallets_24_words, wallets_12_words)
-    
-    filename = "business_card_wallets.html"
-    with open(filename, "w") as f:
-        f.write(html_content)
-        
-    print(f"Successfully generated wallets in '{filename}'")
-    # Provide instruction to open the file
-    print(f"To view the wallets, open this file in your browser: file://{os.path.abspath(filename)}")
+    output_format = input("Output format, html, pdf, zpl, pbm or pcl (default html): ").strip().lower() or "html"
+    wallets_per_file = input("Wallets per output file (leave empty for a single file): ").strip() if output_format == "html" else ""
+    run_job(build_job(JOB_FIELDS, {'title': title, 'wallets_24': num_wallets_24, 'wallets_12': num_wallets_12,
+                                   'format': output_format, 'wallets_per_file': wallets_per_file or None}))
 
 
 if __name__ == "__main__":
@@ -35,14 +35,27 @@ def setup_virtual_environment():
 setup_virtual_environment()
 
 from mnemonic import Mnemonic
-from bip_utils import Bip39SeedGenerator, Bip84, Bip84Coins, Bip44Changes
+from bip_utils import Bip84, Bip84Coins, Bip44Changes
+from wallet_seed import mnemonic_to_seed
+from datetime import datetime
+from wallet_export import WalletExportWriter
+from wallet_jobs import parse_jobs, run_jobs, check_new_target
+
+# Public wallet data (xpub, paths, addresses, time) is also written here in the wallet_export format, None disables it
+EXPORT_PATH = None
+# Settings of one run, for job spec files and command line flags (see wallet_jobs.py)
+JOB_FIELDS = {
+    'words': (int, 24, "mnemonic length", (12, 24)),
+    'addresses': (int, 2, "number of native SegWit addresses", None),
+    'export': (str, EXPORT_PATH, "also write the public wallet data to this wallet_export file", None),
+}
 
 def generate_mnemonic(strength):
     mnemo = Mnemonic("english")
     return mnemo.generate(strength=strength)
 
 def get_seed_bytes(mnemonic):
-    return Bip39SeedGenerator(mnemonic).Generate()
+    return mnemonic_to_seed(mnemonic)
 
 def derive_addresses(seed_bytes, n_address_count=2):
     addresses = []
@@ -54,23 +67,42 @@ def derive_addresses(seed_bytes, n_address_count=2):
         addresses.append(address)
     return addresses
 
-def main():
-    choice = input("Choose mnemonic length (12 or 24 words): ").strip()
-    if choice not in ["12", "24"]:
-        print("Invalid choice. Please enter either '12' or '24'.")
-        sys.exit(1)
-    
-    strength = 128 if choice == "12" else 256
+def generate_and_print(strength, n_address_count=2, export_path=EXPORT_PATH):
     mnemonic = generate_mnemonic(strength)
     print("Generated Mnemonic:", mnemonic)
 
     seed_bytes = get_seed_bytes(mnemonic)
-    addresses = derive_addresses(seed_bytes)
+    addresses = derive_addresses(seed_bytes, n_address_count)
 
-    print("\nFirst two native SegWit addresses:")
+    print("\nFirst two native SegWit addresses:" if n_address_count == 2 else f"\nFirst {n_address_count} native SegWit addresses:")
     for idx, address in enumerate(addresses, 1):
         print(f"Address {idx}: {address}")
 
+    if export_path:
+        account_ext_pub_key = Bip84.FromSeed(seed_bytes, Bip84Coins.BITCOIN).Purpose().Coin().Account(0).PublicKey().ToExtended()
+        created = datetime.now()
+        with WalletExportWriter(export_path) as exporter:
+            for idx, address in enumerate(addresses):
+                exporter.add("", account_ext_pub_key, f"m/84'/0'/0'/0/{idx}", address, created)
+    return f"{len(addresses)} addresses"
+
+def run_job(job):
+    check_new_target(job, job['export'])
+    return generate_and_print(128 if job['words'] == 12 else 256, job['addresses'], job['export'])
+
+def main():
+    # with a job spec or flags all jobs run without prompts, see wallet_jobs.py
+    jobs = parse_jobs(JOB_FIELDS, "Generate a BIP39 mnemonic and print its first native SegWit addresses.")
+    if jobs is not None:
+        sys.exit(1 if run_jobs(jobs, run_job) else 0)
+    choice = input("Choose mnemonic length (12 or 24 words): ").strip()
+    if choice not in ["12", "24"]:
+        print("Invalid choice. Please enter either '12' or '24'.")
+        sys.exit(1)
+    
+    strength = 128 if choice == "12" else 256
+    generate_and_print(strength)
+
 if __name__ == "__main__":
     main()
 
@@ -35,17 +35,25 @@ def setup_virtual_environment():
 setup_virtual_environment()
 
 from mnemonic import Mnemonic
-from bip_utils import Bip39SeedGenerator, Bip84, Bip84Coins, Bip44Changes
-import qrcode
+from bip_utils import Bip84, Bip84Coins, Bip44Changes
+from wallet_seed import mnemonic_to_seed
+from wallet_qr import qr_image
 from fpdf import FPDF
 from datetime import datetime
+from wallet_jobs import parse_jobs, run_jobs, job_file_name, check_new_target
+
+# Settings of one run, for job spec files and command line flags (see wallet_jobs.py)
+JOB_FIELDS = {
+    'words': (int, 24, "mnemonic length", (12, 24)),
+    'output': (str, None, "output PDF file, larger_card.pdf by default", None),
+}
 
 def generate_mnemonic(strength):
     mnemo = Mnemonic("english")
     return mnemo.generate(strength=strength)
 
 def get_seed_bytes(mnemonic):
-    return Bip39SeedGenerator(mnemonic).Generate()
+    return mnemonic_to_seed(mnemonic)
 
 def derive_address(seed_bytes):
     bip_obj = Bip84.FromSeed(seed_bytes, Bip84Coins.BITCOIN)
@@ -55,18 +63,10 @@ def derive_address(seed_bytes):
     return address
 
 def generate_qr_code(data):
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=1,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-    return img
-
-def create_larger_card(mnemonic, address, qr_img):
+    # wallet_qr pins version and mask for addresses
+    return qr_image(data, box_size=10, border=1)
+
+def create_larger_card(mnemonic, address, qr_img, file_name="larger_card.pdf"):
     pdf = FPDF(orientation='P', unit='in', format=(4, 5))  # Adjusted size
     pdf.add_page()
     pdf.set_font('Arial', '', 10)
@@ -95,22 +95,35 @@ def create_larger_card(mnemonic, address, qr_img):
     pdf.cell(0, 0.10, f'Created on: {datetime.now().strftime("%Y-%m-%d")}', ln=1)
 
     # Save PDF
-    pdf.output("larger_card.pdf")
+    pdf.output(file_name)
+
+def create_card(strength, file_name="larger_card.pdf"):
+    mnemonic = generate_mnemonic(strength)
+    seed_bytes = get_seed_bytes(mnemonic)
+    address = derive_address(seed_bytes)
+    qr_img = generate_qr_code(address)
+
+    create_larger_card(mnemonic, address, qr_img, file_name)
+    print("Larger card PDF has been created with the mnemonic and Bitcoin address.")
+    return file_name
+
+def run_job(job):
+    file_name = job['output'] or job_file_name(job, "larger_card.pdf")
+    check_new_target(job, file_name)
+    return create_card(128 if job['words'] == 12 else 256, file_name)
 
 def main():
+    # with a job spec or flags all jobs run without prompts, see wallet_jobs.py
+    jobs = parse_jobs(JOB_FIELDS, "Generate a BIP39 mnemonic and a printable card with its first address.")
+    if jobs is not None:
+        sys.exit(1 if run_jobs(jobs, run_job) else 0)
     choice = input("Choose mnemonic length (12 or 24 words): ").strip()
     if choice not in ["12", "24"]:
         print("Invalid choice. Please enter either '12' or '24'.")
         sys.exit(1)
     
     strength = 128 if choice == "12" else 256
-    mnemonic = generate_mnemonic(strength)
-    seed_bytes = get_seed_bytes(mnemonic)
-    address = derive_address(seed_bytes)
-    qr_img = generate_qr_code(address)
-
-    create_larger_card(mnemonic, address, qr_img)
-    print("Larger card PDF has been created with the mnemonic and Bitcoin address.")
+    create_card(strength)
 
 if __name__ == "__main__":
     main()
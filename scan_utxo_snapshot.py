@@ -0,0 +1,262 @@
+import subprocess
+import sys
+import os
+
+def setup_virtual_environment():
+    """
+    Sets up a virtual environment, installs dependencies, and ensures the
+    script runs within it.
+    """
+    venv_dir = "venv"
+    if sys.prefix == os.path.abspath(venv_dir):
+        # Already in the correct virtual environment
+        return
+
+    if not os.path.exists(venv_dir):
+        print("Creating virtual environment...")
+        subprocess.check_call([sys.executable, "-m", "venv", venv_dir])
+
+    # Determine the path to the python executable in the venv
+    if sys.platform == "win32":
+        python_executable = os.path.join(venv_dir, "Scripts", "python.exe")
+    else:
+        python_executable = os.path.join(venv_dir, "bin", "python")
+
+    # Uninstall old fpdf versions and install dependencies
+    print("Uninstalling old fpdf versions and installing dependencies...")
+    subprocess.check_call([python_executable, "-m", "pip", "uninstall", "--yes", "fpdf", "pypdf"])
+    subprocess.check_call([python_executable, "-m", "pip", "install", "-r", "requirements.txt"])
+
+    # Relaunch the script with the venv's python
+    print("Relaunching script in the virtual environment...")
+    os.execv(python_executable, [python_executable] + sys.argv)
+
+# Setup virtual environment and dependencies before importing them
+setup_virtual_environment()
+
+import argparse
+import itertools
+import struct
+from bip_utils import Bip44, Bip49, Bip84, Bip44Coins, Bip49Coins, Bip84Coins, Bip44Changes
+from wallet_seed import stretch_seeds
+from wallet_ec import public_child_keys
+
+# Offline audit: which of our addresses appear in a local UTXO / balance snapshot?
+#
+# The snapshot is streamed once from disk and probed against a hash table of derived
+# addresses (the small side of the join), so memory only grows with the number of
+# derived addresses, never with the snapshot. Each chain (BIP type, external/change)
+# starts with gap_limit addresses and is extended whenever a hit lands within gap_limit
+# of its end. Reading goes on around the file: an address added mid-scan is matched
+# against every row once, from where it was added to the end of the file and then from
+# the start up to that point again, so a rescan only reads the prefix the newest
+# addresses still need.
+
+# Compact binary snapshot: this magic, then records of
+# <uint8 address length><address ascii><uint64 little endian amount in satoshi>
+BINARY_SNAPSHOT_MAGIC = b"UTXOSNAP1\n"
+READ_BUFFER_SIZE = 1 << 20
+
+BIP_CLASSES = {
+    'BIP44': (Bip44, Bip44Coins.BITCOIN, 44),
+    'BIP49': (Bip49, Bip49Coins.BITCOIN, 49),
+    'BIP84': (Bip84, Bip84Coins.BITCOIN, 84),
+}
+# account extended public key prefixes, as written by the other scripts
+XPUB_PREFIXES = {'xpub': 'BIP44', 'ypub': 'BIP49', 'zpub': 'BIP84'}
+CHAINS = [(0, Bip44Changes.CHAIN_EXT), (1, Bip44Changes.CHAIN_INT)]
+
+
+class Chain:
+    """
+    One derivation chain (e.g. BIP84 external) of one wallet, derived from the account
+    xpub. The addresses are derived by public derivation on the wallet_ec derivation
+    backend and encoded by bip_utils.
+    """
+
+    def __init__(self, label, bip_type, account_ext_pub_key, change_index, change):
+        bip_cls, coin_type, self.purpose = BIP_CLASSES[bip_type]
+        self.label = label
+        self.bip_type = bip_type
+        self.change_index = change_index
+        change_ctx = bip_cls.FromExtendedKey(account_ext_pub_key, coin_type).Change(change)
+        self.public_key = change_ctx.PublicKey().RawCompressed().ToBytes()
+        self.chain_code = change_ctx.PublicKey().ChainCode().ToBytes()
+        coin_conf = change_ctx.CoinConf()
+        self.addr_class, self.addr_params = coin_conf.AddrClass(), coin_conf.AddrParams()
+        self.derived = 0
+
+    def path(self, index):
+        return f"m/{self.purpose}'/0'/0'/{self.change_index}/{index}"
+
+    def derive_until(self, end):
+        """Yields (address, index) for the indexes not derived yet below end."""
+        start = self.derived
+        for index, public_key in enumerate(public_child_keys(self.public_key, self.chain_code, start, end), start):
+            yield self.addr_class.EncodeKey(public_key, **self.addr_params), index
+        self.derived = max(self.derived, end)
+
+
+def chains_from_seed(label, seed_bytes):
+    chains = []
+    for bip_type, (bip_cls, coin_type, _) in BIP_CLASSES.items():
+        account_ext_pub_key = bip_cls.FromSeed(seed_bytes, coin_type).Purpose().Coin().Account(0).PublicKey().ToExtended()
+        for change_index, change in CHAINS:
+            chains.append(Chain(label, bip_type, account_ext_pub_key, change_index, change))
+    return chains
+
+
+def chains_from_xpub(label, account_ext_pub_key):
+    bip_type = XPUB_PREFIXES.get(account_ext_pub_key[:4])
+    if bip_type is None:
+        raise ValueError(f"Unsupported extended public key prefix: {account_ext_pub_key[:4]}")
+    return [Chain(label, bip_type, account_ext_pub_key, change_index, change) for change_index, change in CHAINS]
+
+
+def iter_csv_snapshot(file, start, end):
+    """
+    Yields (offset, address bytes, amount) from a CSV snapshot between two byte offsets.
+    The address and amount columns are taken from the header when there is one
+    (address, amount or value), otherwise the first two columns are used.
+    """
+    file.seek(0)
+    header = file.readline()
+    columns = [c.strip().lower() for c in header.split(b",")]
+    if b"address" in columns:
+        address_col = columns.index(b"address")
+        amount_col = next((columns.index(c) for c in (b"amount", b"value") if c in columns), None)
+        offset = len(header)
+    else:
+        address_col, amount_col, offset = 0, 1, 0
+    if start > offset:
+        file.seek(start)
+        offset = start
+    else:
+        file.seek(offset)
+    for line in file:
+        if offset >= end:
+            break
+        fields = line.rstrip(b"\r\n").split(b",")
+        if len(fields) > address_col:
+            amount = fields[amount_col] if amount_col is not None and len(fields) > amount_col else b"0"
+            yield offset, fields[address_col].strip(), amount
+        offset += len(line)
+
+
+def iter_binary_snapshot(file, start, end):
+    """Yields (offset, address bytes, amount) from a compact binary snapshot between two byte offsets."""
+    offset = max(start, len(BINARY_SNAPSHOT_MAGIC))
+    file.seek(offset)
+    buffer = b""
+    position = 0
+    unpack_amount = struct.Struct("<Q").unpack_from
+    while offset < end:
+        if len(buffer) - position < 265:
+            buffer = buffer[position:] + file.read(READ_BUFFER_SIZE)
+            position = 0
+            if not buffer:
+                break
+        length = buffer[position]
+        record_end = position + 1 + length + 8
+        if record_end > len(buffer):
+            raise ValueError(f"Truncated snapshot record at offset {offset}")
+        address = buffer[position + 1:position + 1 + length]
+        amount = unpack_amount(buffer, position + 1 + length)[0]
+        yield offset, address, amount
+        offset += record_end - position
+        position = record_end
+
+
+def open_snapshot(path):
+    file = open(path, "rb")
+    is_binary = file.read(len(BINARY_SNAPSHOT_MAGIC)) == BINARY_SNAPSHOT_MAGIC
+    return file, (iter_binary_snapshot if is_binary else iter_csv_snapshot)
+
+
+def parse_amount(amount):
+    """Amounts are satoshi integers, decimal values in CSV snapshots are taken as BTC."""
+    if isinstance(amount, int):
+        return amount
+    try:
+        return int(amount)
+    except ValueError:
+        return round(float(amount) * 100_000_000)
+
+
+def scan_snapshot(snapshot_path, chains, gap_limit=20):
+    """
+    Joins the snapshot against the addresses of all chains, returns a list of hits
+    (label, bip type, path, address, amount in satoshi). The snapshot is read once in
+    full; gap limit extensions only cause a rescan of the part they have not seen yet.
+    """
+    file, iter_snapshot = open_snapshot(snapshot_path)
+    file_size = os.path.getsize(snapshot_path)
+    hits = []
+    # address -> (chain, index, read position where it was added); read positions count
+    # on over the passes (pass * file size + offset), every address is matched against
+    # the rows from its own position up to one file size later
+    table = {}
+
+    def extend(chain, end, position):
+        for address, index in chain.derive_until(end):
+            table[address.encode()] = (chain, index, position)
+
+    for chain in chains:
+        extend(chain, gap_limit, 0)
+
+    with file:
+        read_end = file_size
+        base = 0
+        while base < read_end:
+            for offset, address, amount in iter_snapshot(file, 0, file_size):
+                position = base + offset
+                if position >= read_end:
+                    break
+                entry = table.get(address)
+                if entry is None or position >= entry[2] + file_size:
+                    continue
+                chain, index, _ = entry
+                hits.append((chain.label, chain.bip_type, chain.path(index), address.decode(), parse_amount(amount)))
+                if index + gap_limit >= chain.derived:
+                    extend(chain, index + gap_limit + 1, position)
+                    # the new addresses still have to see the rows up to this one
+                    read_end = max(read_end, position + file_size)
+            base += file_size
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan a local UTXO snapshot for addresses derived from mnemonics or xpubs.")
+    parser.add_argument("snapshot", help="CSV (address, amount columns) or compact binary snapshot file")
+    parser.add_argument("--mnemonic-file", help="file with one mnemonic per line")
+    parser.add_argument("--xpub", action="append", default=[], help="account extended public key (xpub/ypub/zpub), can be repeated")
+    parser.add_argument("--gap-limit", type=int, default=20)
+    args = parser.parse_args()
+
+    chains = []
+    if args.mnemonic_file:
+        with open(args.mnemonic_file) as f:
+            mnemonics = ((f"mnemonic #{number}", line.strip()) for number, line in enumerate(f, start=1) if line.strip())
+            labelled, pairs = itertools.tee(mnemonics)
+            # the seeds are stretched on all cores (wallet_seed.py), in file order, while the
+            # file is read, so only the mnemonics in flight are held in memory
+            seeds = stretch_seeds(((mnemonic, "") for _, mnemonic in pairs), validate=True)
+            for (label, _), seed_bytes in zip(labelled, seeds):
+                chains.extend(chains_from_seed(label, seed_bytes))
+    for account_ext_pub_key in args.xpub:
+        chains.extend(chains_from_xpub(account_ext_pub_key[:12] + "...", account_ext_pub_key))
+    if not chains:
+        parser.error("Give at least one --mnemonic-file or --xpub")
+
+    hits = scan_snapshot(args.snapshot, chains, args.gap_limit)
+
+    totals = {}
+    for label, bip_type, path, address, amount in hits:
+        print(f"{label} | {bip_type} | {path} | {address} | {amount}")
+        totals[label] = totals.get(label, 0) + amount
+    print(f"\n{len(hits)} outputs found")
+    for label, total in totals.items():
+        print(f"{label}: {total} sat")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import qrcode
+from qrcode.util import QRData, MODE_NUMBER, MODE_8BIT_BYTE
+from mnemonic import Mnemonic
+from wallet_qr import ERROR_CORRECTION, matrix_to_image
+
+# SeedQR mnemonic encodings (https://github.com/SeedSigner/seedsigner/blob/dev/docs/seed_qr/README.md)
+#
+# Standard SeedQR: the BIP39 word indexes, each zero padded to 4 digits, as one numeric
+#   string. 12 words -> 48 digits (version 2), 24 words -> 96 digits (version 3).
+# CompactSeedQR: the raw entropy bytes in byte mode. 12 words -> 16 bytes (version 1),
+#   24 words -> 32 bytes (version 2).
+# The full word string needs version 5 (12 words) or version 7 (24 words) at the same
+# error correction level, so these are much faster to encode, print and scan.
+
+MNEMONIC_QR_FORMATS = ('words', 'seedqr', 'compact_seedqr')
+MNEMONIC_QR_LABELS = {'words': '', 'seedqr': ' (SeedQR)', 'compact_seedqr': ' (CompactSeedQR)'}
+
+# word count -> QR version, for standard and compact codes
+SEEDQR_VERSIONS = {12: 2, 24: 3}
+COMPACT_SEEDQR_VERSIONS = {12: 1, 24: 2}
+
+_mnemo = Mnemonic("english")
+_word_indexes = {word: index for index, word in enumerate(_mnemo.wordlist)}
+
+
+def seedqr_digits(mnemonic):
+    return "".join(f"{_word_indexes[word]:04d}" for word in mnemonic.split())
+
+
+def compact_seedqr_bytes(mnemonic):
+    return bytes(_mnemo.to_entropy(mnemonic.split()))
+
+
+def decode_seedqr(data):
+    """
+    Returns the mnemonic of a scanned SeedQR: a digit string (standard) or the raw
+    bytes (compact). Raises ValueError if the data is not a valid SeedQR.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        if len(data) not in (16, 32):
+            raise ValueError(f"CompactSeedQR must be 16 or 32 bytes, got {len(data)}")
+        return _mnemo.to_mnemonic(bytes(data))
+    if not (data.isascii() and data.isdigit()) or len(data) not in (48, 96):
+        raise ValueError("SeedQR must be 48 or 96 digits")
+    indexes = [int(data[i:i + 4]) for i in range(0, len(data), 4)]
+    if max(indexes) >= len(_mnemo.wordlist):
+        raise ValueError(f"SeedQR word index {max(indexes)} is out of range (0-{len(_mnemo.wordlist) - 1})")
+    words = [_mnemo.wordlist[index] for index in indexes]
+    mnemonic = " ".join(words)
+    if not _mnemo.check(mnemonic):
+        raise ValueError("SeedQR checksum does not match")
+    return mnemonic
+
+
+def seedqr_matrix(mnemonic, compact=False):
+    word_count = len(mnemonic.split())
+    if word_count not in SEEDQR_VERSIONS:
+        raise ValueError("SeedQR needs a 12 or 24 word mnemonic")
+    if compact:
+        data = QRData(compact_seedqr_bytes(mnemonic), mode=MODE_8BIT_BYTE, check_data=False)
+        version = COMPACT_SEEDQR_VERSIONS[word_count]
+    else:
+        data = QRData(seedqr_digits(mnemonic), mode=MODE_NUMBER)
+        version = SEEDQR_VERSIONS[word_count]
+    qr = qrcode.QRCode(version=version, error_correction=ERROR_CORRECTION)
+    qr.add_data(data)
+    qr.make(fit=False)
+    return qr.modules
+
+
+def mnemonic_qr_image(mnemonic, qr_format='words', box_size=5, border=2):
+    """QR image of a mnemonic in one of MNEMONIC_QR_FORMATS."""
+    if qr_format == 'words':
+        qr = qrcode.QRCode(version=1, error_correction=ERROR_CORRECTION)
+        qr.add_data(mnemonic)
+        qr.make(fit=True)
+        modules = qr.modules
+    elif qr_format in ('seedqr', 'compact_seedqr'):
+        modules = seedqr_matrix(mnemonic, compact=qr_format == 'compact_seedqr')
+    else:
+        raise ValueError(f"Unknown mnemonic QR format: {qr_format}")
+    return matrix_to_image(modules, box_size, border)
+
+
+if __name__ == "__main__":
+    # python seedqr.py <digits>  or  python seedqr.py --hex <compact seedqr bytes as hex>
+    import sys
+    if len(sys.argv) == 3 and sys.argv[1] == "--hex":
+        print(decode_seedqr(bytes.fromhex(sys.argv[2])))
+    elif len(sys.argv) == 2 and sys.argv[1] != "--hex":
+        print(decode_seedqr(sys.argv[1]))
+    else:
+        sys.exit("usage: python seedqr.py <digits>  or  python seedqr.py --hex <compact seedqr bytes as hex>")
@@ -0,0 +1,244 @@
+import io
+import zlib
+
+# Minimal streaming PDF writer for very large card batches.
+#
+# fpdf keeps the whole document in memory until output(), and the {nb} alias needs the
+# page count at the end. Here every finished page (its content stream, page object and
+# QR image XObjects) is written to disk right away; only the byte offsets of the
+# objects are kept for the cross-reference table written by close(). The fonts are the
+# standard Helvetica faces (nothing embedded) and are shared by all pages.
+#
+# import_page() starts a page that shows a page of another PDF (read with pypdf), the
+# drawing methods then draw on top of it. The objects the page uses are copied as they
+# are reached, once per source document, so documents rendered in parts can be joined
+# page by page without ever holding the joined document in memory.
+#
+# Coordinates are in mm from the top left corner of the page, like fpdf.
+
+MM = 72 / 25.4
+
+CATALOG_ID = 1
+PAGES_ID = 2
+FONT_IDS = {'': 3, 'B': 4, 'I': 5}
+BASE_FONTS = {'': "Helvetica", 'B': "Helvetica-Bold", 'I': "Helvetica-Oblique"}
+FIRST_FREE_ID = 6
+
+
+def _escape(text):
+    # the fonts are WinAnsiEncoding, so text goes in as cp1252 bytes (anything cp1252 cannot
+    # show becomes "?"); bytes outside printable ASCII are written as octal escapes
+    escaped = []
+    for byte in text.encode("cp1252", errors="replace"):
+        if byte in b"\\()":
+            escaped.append("\\" + chr(byte))
+        elif 32 <= byte < 127:
+            escaped.append(chr(byte))
+        else:
+            escaped.append(f"\\{byte:03o}")
+    return "".join(escaped)
+
+
+def _font_name(style):
+    # not F<n>, imported pages (fpdf) already use those names for their own fonts
+    return f"SF{FONT_IDS[style]}"
+
+
+def _generic():
+    # pypdf is only needed to import pages, the card generators run without it
+    from pypdf import generic
+    return generic
+
+
+def _serialized(value):
+    buffer = io.BytesIO()
+    value.write_to_stream(buffer)
+    return buffer.getvalue()
+
+
+def _encoded_data(stream):
+    # a serialized stream is its dictionary, then the encoded data between "stream" and
+    # "endstream"; pypdf escapes control characters in strings, so the first line break
+    # before "stream" ends the dictionary
+    serialized = _serialized(stream)
+    return serialized[serialized.index(b"\nstream\n") + len(b"\nstream\n"):-len(b"\nendstream")]
+
+
+class StreamingPDF:
+
+    def __init__(self, path, page_width=210, page_height=297):
+        self.file = open(path, "wb")
+        self.page_width = page_width
+        self.page_height = page_height
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = FIRST_FREE_ID
+        self.content = None
+        self.page_images = None
+        self.position = 0
+        self.imported = None
+        self.import_source = None
+        self.import_ids = None
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for style, object_id in FONT_IDS.items():
+            self._object(object_id, f"<< /Type /Font /Subtype /Type1 /BaseFont /{BASE_FONTS[style]} /Encoding /WinAnsiEncoding >>".encode())
+
+    def _write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def _new_id(self):
+        object_id = self.next_id
+        self.next_id += 1
+        return object_id
+
+    def _object(self, object_id, body, stream=None):
+        self.offsets[object_id] = self.position
+        self._write(f"{object_id} 0 obj\n".encode() + body)
+        if stream is not None:
+            self._write(b"\nstream\n" + stream + b"\nendstream")
+        self._write(b"\nendobj\n")
+
+    def add_page(self):
+        if self.content is not None:
+            self.end_page()
+        self.content = []
+        self.page_images = {}
+
+    def import_page(self, page):
+        """
+        Starts a page showing page (a pypdf PageObject), later drawing goes on top of it.
+        Only the page tree entry of the source is not followed, links to other pages of
+        the source are not supported (fpdf parts have none).
+        """
+        generic = _generic()
+        self.add_page()
+        source = page.pdf
+        if source is not self.import_source:
+            self.import_source = source
+            self.import_ids = {source.trailer['/Root'].raw_get('/Pages').idnum: PAGES_ID}
+        pending = []
+        resources = {}
+        for category, value in page['/Resources'].get_object().items():
+            value = value.get_object()
+            if isinstance(value, generic.DictionaryObject):
+                resources[category] = {name: self._copied(item, pending) for name, item in value.items()}
+            else:
+                resources[category] = self._copied(value, pending)
+        contents = page.raw_get('/Contents')
+        contents = contents.get_object() if isinstance(contents.get_object(), generic.ArrayObject) else [contents]
+        contents = [self._copied(item, pending) for item in contents]
+        media_box = self._copied(page.raw_get('/MediaBox'), pending)
+        self.imported = (resources, contents, media_box)
+        while pending:
+            self._copy_object(pending.pop())
+
+    def _copied(self, value, pending):
+        """value serialized with its references renumbered, unseen referenced objects are queued."""
+        generic = _generic()
+        if isinstance(value, generic.IndirectObject):
+            if value.idnum not in self.import_ids:
+                self.import_ids[value.idnum] = self._new_id()
+                pending.append(value)
+            return f"{self.import_ids[value.idnum]} 0 R".encode()
+        if isinstance(value, generic.DictionaryObject):
+            return b"<< " + b" ".join(_serialized(key) + b" " + self._copied(item, pending)
+                                      for key, item in value.items()) + b" >>"
+        if isinstance(value, generic.ArrayObject):
+            return b"[" + b" ".join(self._copied(item, pending) for item in value) + b"]"
+        return _serialized(value)
+
+    def _copy_object(self, reference):
+        generic = _generic()
+        value = reference.get_object()
+        object_id = self.import_ids[reference.idnum]
+        pending = []
+        if isinstance(value, generic.StreamObject):
+            # the encoded data is copied as it is, whatever the filters
+            data = _encoded_data(value)
+            body = b" ".join(_serialized(generic.NameObject(key)) + b" " + self._copied(item, pending)
+                             for key, item in value.items() if key != '/Length')
+            self._object(object_id, b"<< " + body + f" /Length {len(data)} >>".encode(), data)
+        else:
+            self._object(object_id, self._copied(value, pending))
+        for item in pending:
+            self._copy_object(item)
+
+    def set_line_width(self, width):
+        self.content.append(f"{width * MM:.2f} w")
+
+    def text(self, x, y, text, size=10, style=''):
+        """Draws text with its baseline at (x, y)."""
+        self.content.append(
+            f"BT /{_font_name(style)} {size} Tf {x * MM:.2f} {(self.page_height - y) * MM:.2f} Td ({_escape(text)}) Tj ET")
+
+    def rect(self, x, y, w, h):
+        self.content.append(f"{x * MM:.2f} {(self.page_height - y - h) * MM:.2f} {w * MM:.2f} {h * MM:.2f} re S")
+
+    def line(self, x1, y1, x2, y2):
+        self.content.append(
+            f"{x1 * MM:.2f} {(self.page_height - y1) * MM:.2f} m {x2 * MM:.2f} {(self.page_height - y2) * MM:.2f} l S")
+
+    def qr(self, modules, x, y, size):
+        """
+        Places a QR matrix (list of rows of bools) as a 1 bit image XObject. The image is
+        written to disk immediately, the page only keeps its name.
+        """
+        side = len(modules)
+        rows = []
+        for row in modules:
+            bits = "".join("0" if module else "1" for module in row).ljust((side + 7) // 8 * 8, "1")
+            rows.append(int(bits, 2).to_bytes(len(bits) // 8, "big"))
+        data = zlib.compress(b"".join(rows))
+        image_id = self._new_id()
+        self._object(image_id, (
+            f"<< /Type /XObject /Subtype /Image /Width {side} /Height {side} /ColorSpace /DeviceGray "
+            f"/BitsPerComponent 1 /Interpolate false /Filter /FlateDecode /Length {len(data)} >>").encode(), data)
+        name = f"Im{image_id}"
+        self.page_images[name] = image_id
+        self.content.append(
+            f"q {size * MM:.2f} 0 0 {size * MM:.2f} {x * MM:.2f} {(self.page_height - y - size) * MM:.2f} cm /{name} Do Q")
+
+    def end_page(self):
+        stream = zlib.compress("\n".join(self.content).encode())
+        content_id = self._new_id()
+        self._object(content_id, f"<< /Filter /FlateDecode /Length {len(stream)} >>".encode(), stream)
+        resources, contents, media_box = self.imported or (
+            {}, [], f"[0 0 {self.page_width * MM:.2f} {self.page_height * MM:.2f}]".encode())
+        resources = dict(resources)
+        resources['/Font'] = dict(resources.get('/Font', {}))
+        resources['/Font'].update({f"/{_font_name(style)}": f"{object_id} 0 R".encode() for style, object_id in FONT_IDS.items()})
+        resources['/XObject'] = dict(resources.get('/XObject', {}))
+        resources['/XObject'].update({f"/{name}": f"{image_id} 0 R".encode() for name, image_id in self.page_images.items()})
+        resources = b" ".join(category.encode() + b" " + (
+            b"<< " + b" ".join(name.encode() + b" " + item for name, item in value.items()) + b" >>"
+            if isinstance(value, dict) else value) for category, value in resources.items())
+        # an imported page keeps its own content first, what was drawn here goes on top
+        contents = b" ".join(contents + [f"{content_id} 0 R".encode()])
+        page_id = self._new_id()
+        self._object(page_id, f"<< /Type /Page /Parent {PAGES_ID} 0 R /MediaBox ".encode() + media_box +
+                     b" /Resources << " + resources + b" >> /Contents [" + contents + b"] >>")
+        self.page_ids.append(page_id)
+        self.content = None
+        self.page_images = None
+        self.imported = None
+        # the finished page goes to disk now
+        self.file.flush()
+
+    def page_no(self):
+        return len(self.page_ids) + (1 if self.content is not None else 0)
+
+    def close(self):
+        if self.content is not None:
+            self.end_page()
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self._object(PAGES_ID, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode())
+        self._object(CATALOG_ID, f"<< /Type /Catalog /Pages {PAGES_ID} 0 R >>".encode())
+        xref_position = self.position
+        count = self.next_id
+        xref = [f"xref\n0 {count}\n", "0000000000 65535 f \n"]
+        for object_id in range(1, count):
+            xref.append(f"{self.offsets[object_id]:010d} 00000 n \n")
+        self._write("".join(xref).encode())
+        self._write(f"trailer\n<< /Size {count} /Root {CATALOG_ID} 0 R >>\nstartxref\n{xref_position}\n%%EOF\n".encode())
+        self.file.close()
@@ -0,0 +1,338 @@
+import os
+import sys
+import time
+import random
+import hmac
+import hashlib
+import importlib.util
+
+# secp256k1 backends for the address-heavy derivation of this repo and for the verifier.
+#
+# Backends, in order of preference:
+#   coincurve  libsecp256k1 binding, by far the fastest
+#   ecdsa      python-ecdsa, pure Python with precomputed generator tables
+#   python     the hashlib-only implementation below, always available
+#
+# Two backends are selected:
+#   derivation  pubkey(), tweak_add() and public_child_keys(), used where many addresses
+#               come from one extended public key (scan_utxo_snapshot.py, the address
+#               books of the PDF script). The fastest available one unless EC_BACKEND
+#               (or WALLET_EC_BACKEND) pins another.
+#   verifier    verify_pubkey(), used by wallet_verify. Unless VERIFY_EC_BACKEND (or
+#               WALLET_VERIFY_EC_BACKEND) pins one, the first available backend that
+#               neither bip_utils nor the derivation backend uses, so a printed address is
+#               never checked by the EC library that produced it. It is the slower one on
+#               purpose; when no other backend is left it shares the derivation backend.
+# Both choices go into the environment, which worker processes inherit. Before a backend
+# is first used, all available backends are checked against the BIP32 test vector 1
+# public keys; a backend that disagrees raises ValueError.
+#
+# Seeds, master and account keys are still derived by bip_utils with its own backend
+# (coincurve unless EccConf.USE_COINCURVE is turned off), which cannot be switched from
+# here; backend_report() shows it next to ours.
+#
+# python wallet_ec.py prints the report, keys per second of every backend and the
+# public derivation rate of bip_utils and of the derivation backend.
+
+EC_BACKEND = os.environ.get("WALLET_EC_BACKEND") or None
+VERIFY_EC_BACKEND = os.environ.get("WALLET_VERIFY_EC_BACKEND") or None
+
+# secp256k1 curve parameters
+P = 2**256 - 2**32 - 977
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+G = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+     0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+
+# BIP32 test vector 1: seed, then (path, private key, compressed public key). The last
+# two steps are non-hardened, they are also checked by public derivation (tweak_add).
+TEST_VECTOR_SEED = bytes.fromhex("000102030405060708090a0b0c0d0e0f")
+TEST_VECTOR = [
+    ("m", 0xe8f32e723decf4051aefac8e2c93c9c5b214313817cdb01a1494b917c8436b35,
+     "0339a36013301597daef41fbe593a02cc513d0b55527ec2df1050e2e8ff49c85c2"),
+    ("m/0'", 0xedb2e14f9ee77d26dd93b4ecede8d16ed408ce149b6cd80b0715a2d911a0afea,
+     "035a784662a4a20a65bf6aab9ae98a6c068a81c52e4b032c0fb5400c706cfccc56"),
+    ("m/0'/1", 0x3c6cb8d0f6a264c91ea8b5030fadaa8e538b020f0a387421a12de9319dc93368,
+     "03501e454bf00751f24b1b489aa925215d66af2234e3891c3b21a52bedb3cd711c"),
+    ("m/0'/1/2'", 0xcbce0d719ecf7431d88e6a89fa1483e02e35092af60c042b1df2ff59fa424dca,
+     "0357bfe1e341d01c69fe5654309956cbea516822fba8a601743a012a7896ee8dc2"),
+    ("m/0'/1/2'/2", 0x0f479245fb19a38a1954c5c7c0ebab2f9bdfd96a17563ef28a6a4b1a2a764ef4,
+     "02e8445082a72f29b75ca48748a914df60622a609cacfce8ed0e35804560741d29"),
+    ("m/0'/1/2'/2/1000000000", 0x471b76e389e528d6de6d816857e012c5455051cad6660850e58372a6c3e6e7c8,
+     "022a471424da5e657499d1ff51cb43c47481a03b1e77f951fe64cec9f5a48f7011"),
+]
+
+_g_table = None
+_backends = None
+_active = None
+_verify_active = None
+
+
+def _point_add(p1, p2):
+    if p1 is None:
+        return p2
+    if p2 is None:
+        return p1
+    x1, y1 = p1
+    x2, y2 = p2
+    if x1 == x2:
+        if (y1 + y2) % P == 0:
+            return None
+        lam = 3 * x1 * x1 * pow(2 * y1, -1, P) % P
+    else:
+        lam = (y2 - y1) * pow(x2 - x1, -1, P) % P
+    x3 = (lam * lam - x1 - x2) % P
+    return x3, (lam * (x1 - x3) - y1) % P
+
+
+def _base_point_table():
+    # table[i][j] = j * 16**i * G, so k*G needs 64 additions and no doublings
+    global _g_table
+    if _g_table is None:
+        table = []
+        base = G
+        for _ in range(64):
+            row = [None]
+            for _ in range(15):
+                row.append(_point_add(row[-1], base))
+            table.append(row)
+            base = _point_add(row[15], base)
+        _g_table = table
+    return _g_table
+
+
+def point_mul_g(k):
+    table = _base_point_table()
+    result = None
+    for i in range(64):
+        nibble = (k >> (4 * i)) & 0xF
+        if nibble:
+            result = _point_add(result, table[i][nibble])
+    return result
+
+
+def serialize_pubkey(point):
+    x, y = point
+    return bytes([2 + (y & 1)]) + x.to_bytes(32, "big")
+
+
+def parse_pubkey(pubkey):
+    """Point of a compressed public key."""
+    x = int.from_bytes(pubkey[1:33], "big")
+    y = pow((x * x * x + 7) % P, (P + 1) // 4, P)
+    if y & 1 != pubkey[0] & 1:
+        y = P - y
+    return x, y
+
+
+# Every loader returns (pubkey(k), tweak_add(pubkey, tweak)) working on 33 byte
+# compressed public keys, or raises ImportError when its library is missing.
+
+def _coincurve_backend():
+    import coincurve
+
+    def pubkey(k):
+        return coincurve.PublicKey.from_secret(k.to_bytes(32, "big")).format()
+
+    def tweak_add(pubkey, tweak):
+        return coincurve.PublicKey(pubkey).add(tweak.to_bytes(32, "big")).format()
+
+    return pubkey, tweak_add
+
+
+def _ecdsa_backend():
+    from ecdsa import SECP256k1
+    from ecdsa.ellipticcurve import PointJacobi
+    generator = SECP256k1.generator
+
+    def serialize(point):
+        return bytes([2 + (point.y() & 1)]) + point.x().to_bytes(32, "big")
+
+    def pubkey(k):
+        return serialize(generator * k)
+
+    def tweak_add(pubkey, tweak):
+        x, y = parse_pubkey(pubkey)
+        return serialize(PointJacobi(SECP256k1.curve, x, y, 1, generator=False) + generator * tweak)
+
+    return pubkey, tweak_add
+
+
+def _python_backend():
+    def pubkey(k):
+        return serialize_pubkey(point_mul_g(k))
+
+    def tweak_add(pubkey, tweak):
+        return serialize_pubkey(_point_add(parse_pubkey(pubkey), point_mul_g(tweak)))
+
+    return pubkey, tweak_add
+
+
+BACKEND_LOADERS = {'coincurve': _coincurve_backend, 'ecdsa': _ecdsa_backend, 'python': _python_backend}
+
+
+def available_backends():
+    """{name: (pubkey, tweak_add)} of the backends that can be loaded, in order of preference."""
+    global _backends
+    if _backends is None:
+        _backends = {}
+        for name, loader in BACKEND_LOADERS.items():
+            try:
+                _backends[name] = loader()
+            except ImportError:
+                pass
+    return _backends
+
+
+def self_test(backends=None):
+    """
+    Checks the backends against BIP32 test vector 1, by private key and by public
+    derivation of the non-hardened steps. Raises ValueError naming the failing backend.
+    """
+    backends = available_backends() if backends is None else backends
+    for name, (pubkey, tweak_add) in backends.items():
+        for path, key, expected in TEST_VECTOR:
+            if pubkey(key).hex() != expected:
+                raise ValueError(f"secp256k1 backend {name} gives a wrong public key for {path}")
+        for (_, parent_key, parent_pubkey), (path, key, expected) in zip(TEST_VECTOR[3:], TEST_VECTOR[4:]):
+            # child = parent + tweak, so tweak_add(parent pubkey, tweak) must give the child pubkey
+            if tweak_add(bytes.fromhex(parent_pubkey), (key - parent_key) % N).hex() != expected:
+                raise ValueError(f"secp256k1 backend {name} gives a wrong public derivation for {path}")
+
+
+def _backend(name):
+    backends = available_backends()
+    if name not in backends:
+        raise ValueError(f"secp256k1 backend {name} is not available, available: {', '.join(backends)}")
+    self_test()
+    return name, backends[name]
+
+
+def set_backend(name=None):
+    """
+    Selects the derivation backend after the self-test and returns its name, None picks
+    the fastest available one. The choice is also put into the environment for worker
+    processes.
+    """
+    global _active
+    _active = _backend(name or next(iter(available_backends())))
+    os.environ["WALLET_EC_BACKEND"] = _active[0]
+    return _active[0]
+
+
+def set_verify_backend(name=None):
+    """
+    Selects the verifier backend after the self-test and returns its name, None picks
+    the first available one that neither bip_utils nor the derivation backend uses.
+    """
+    global _verify_active
+    if name is None:
+        used = {bip_utils_backend(), active_backend()}
+        name = next((n for n in available_backends() if n not in used), active_backend())
+    _verify_active = _backend(name)
+    os.environ["WALLET_VERIFY_EC_BACKEND"] = _verify_active[0]
+    return _verify_active[0]
+
+
+def active_backend():
+    if _active is None:
+        set_backend(EC_BACKEND)
+    return _active[0]
+
+
+def verify_backend():
+    if _verify_active is None:
+        set_verify_backend(VERIFY_EC_BACKEND)
+    return _verify_active[0]
+
+
+def pubkey(k):
+    """Compressed public key of private key k."""
+    if _active is None:
+        set_backend(EC_BACKEND)
+    return _active[1][0](k)
+
+
+def tweak_add(pubkey, tweak):
+    """Compressed public key of pubkey + tweak*G (BIP32 public child derivation)."""
+    if _active is None:
+        set_backend(EC_BACKEND)
+    return _active[1][1](pubkey, tweak)
+
+
+def verify_pubkey(k):
+    """Compressed public key of private key k, on the verifier backend."""
+    if _verify_active is None:
+        set_verify_backend(VERIFY_EC_BACKEND)
+    return _verify_active[1][0](k)
+
+
+def public_child_keys(pubkey, chain_code, start, stop):
+    """
+    Yields the compressed public keys of the non-hardened children [start, stop) of an
+    extended public key (BIP32 CKDpub), on the derivation backend.
+    """
+    for index in range(start, stop):
+        digest = hmac.new(chain_code, pubkey + index.to_bytes(4, "big"), hashlib.sha512).digest()
+        tweak = int.from_bytes(digest[:32], "big")
+        if tweak >= N:
+            raise ValueError(f"BIP32 child {index} is invalid, derive the next index instead")
+        yield tweak_add(pubkey, tweak)
+
+
+def bip_utils_backend():
+    """
+    The backend bip_utils uses, None if bip_utils is not installed. Before bip_utils is
+    imported this is its default, coincurve (EccConf.USE_COINCURVE).
+    """
+    if "bip_utils" in sys.modules:
+        from bip_utils.ecc.conf import EccConf
+        return "coincurve" if EccConf.USE_COINCURVE else "ecdsa"
+    if importlib.util.find_spec("bip_utils") is None:
+        return None
+    return "coincurve"
+
+
+def backend_report():
+    report = (f"secp256k1 backends: derivation {active_backend()}, verifier {verify_backend()} "
+              f"(available: {', '.join(available_backends())})")
+    bip_utils_name = bip_utils_backend()
+    if bip_utils_name:
+        report += f", bip_utils uses {bip_utils_name}"
+    return report
+
+
+def _rate(function, seconds):
+    count = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        count += function()
+    return count / (time.perf_counter() - started)
+
+
+def benchmark(seconds=0.5):
+    """
+    Returns {name: keys per second}: the public keys of every backend, then the public
+    child derivation of bip_utils and of the derivation backend (public_child_keys).
+    """
+    results = {}
+    keys = [random.randrange(1, N) for _ in range(64)]
+    for name, (pubkey, _) in available_backends().items():
+        results[name] = _rate(lambda: len([pubkey(k) for k in keys]), seconds)
+    if bip_utils_backend() is not None:
+        from bip_utils import Bip84, Bip84Coins, Bip44Changes
+        change = Bip84.FromSeed(TEST_VECTOR_SEED * 4, Bip84Coins.BITCOIN).Purpose().Coin().Account(0).Change(Bip44Changes.CHAIN_EXT)
+        results["bip_utils derivation"] = _rate(
+            lambda: len([change.AddressIndex(i).PublicKey().RawCompressed() for i in range(64)]), seconds)
+        parent, chain_code = change.PublicKey().RawCompressed().ToBytes(), change.PublicKey().ChainCode().ToBytes()
+        results[f"{active_backend()} derivation"] = _rate(
+            lambda: len(list(public_child_keys(parent, chain_code, 0, 64))), seconds)
+    return results
+
+
+if __name__ == "__main__":
+    # loaded only so that the report includes its backend
+    import bip_utils
+    print(backend_report())
+    print("BIP32 test vector self-test passed")
+    for name, keys_per_second in benchmark().items():
+        print(f"  {name:<22} {keys_per_second:12,.0f} keys/s")
@@ -0,0 +1,212 @@
+import os
+import sys
+import json
+import mmap
+import array
+import struct
+from datetime import datetime
+
+# Compact columnar export of public wallet data (labels, account xpubs, paths, addresses,
+# timestamps) for downstream ingestion. Nothing secret is ever written here.
+#
+# File layout (all integers little endian):
+#   FILE_MAGIC
+#   chunk*           CHUNK_MAGIC, uint32 row count, then one contiguous array per column:
+#                      label id uint32, xpub id uint32, path prefix id uint16,
+#                      address index uint32, timestamp int64, address ADDRESS_WIDTH bytes
+#                      (ascii, NUL padded)
+#   footer           JSON: dictionaries (labels, xpubs, path prefixes) and chunk offsets
+#   uint64 footer offset, FILE_MAGIC
+#
+# Paths are stored dictionary encoded: the prefix (e.g. m/84'/0'/0'/0) as an id into the
+# path prefix dictionary and the last component as a plain integer, so paths ending in a
+# hardened index are rejected.
+
+FILE_MAGIC = b"WALLETX1"
+CHUNK_MAGIC = b"CHNK"
+ADDRESS_WIDTH = 62
+CHUNK_ROWS = 65536
+
+# typecode, struct size, name of the numeric columns, in file order
+COLUMNS = [('I', 4, 'label'), ('I', 4, 'xpub'), ('H', 2, 'path_prefix'), ('I', 4, 'index'), ('q', 8, 'timestamp')]
+
+
+class WalletExportWriter:
+    """
+    Appends rows to an export file, a chunk of chunk_rows rows is written as soon as it
+    is full so bulk runs never keep more than one chunk in memory. abort() deletes the
+    file of a failed job; as a context manager it closes on success and aborts on an
+    exception, so no file without a footer is ever left behind.
+    """
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(FILE_MAGIC)
+        self.chunk_rows = chunk_rows
+        self.dictionaries = {'label': {}, 'xpub': {}, 'path_prefix': {}}
+        self.chunks = []
+        self._new_chunk()
+
+    def _new_chunk(self):
+        self.columns = {name: array.array(typecode) for typecode, _, name in COLUMNS}
+        self.addresses = bytearray()
+
+    def _encode(self, dictionary, value):
+        ids = self.dictionaries[dictionary]
+        if value not in ids:
+            ids[value] = len(ids)
+        return ids[value]
+
+    def add(self, label, xpub, path, address, timestamp):
+        """timestamp is a datetime or unix seconds."""
+        prefix, index = path.rsplit("/", 1)
+        if not index.isdigit():
+            raise ValueError(f"Path must end in a non-hardened index: {path}")
+        encoded_address = address.encode()
+        if len(encoded_address) > ADDRESS_WIDTH:
+            raise ValueError(f"Address longer than {ADDRESS_WIDTH} characters: {address}")
+        if isinstance(timestamp, datetime):
+            timestamp = int(timestamp.timestamp())
+
+        self.columns['label'].append(self._encode('label', label or ""))
+        self.columns['xpub'].append(self._encode('xpub', xpub or ""))
+        self.columns['path_prefix'].append(self._encode('path_prefix', prefix))
+        self.columns['index'].append(int(index))
+        self.columns['timestamp'].append(timestamp)
+        self.addresses += encoded_address.ljust(ADDRESS_WIDTH, b"\0")
+        if len(self.columns['index']) == self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        rows = len(self.columns['index'])
+        if not rows:
+            return
+        self.chunks.append({'offset': self.file.tell(), 'rows': rows})
+        self.file.write(CHUNK_MAGIC + struct.pack("<I", rows))
+        for _, _, name in COLUMNS:
+            column = self.columns[name]
+            if sys.byteorder == "big":
+                column.byteswap()
+            self.file.write(column.tobytes())
+        self.file.write(self.addresses)
+        self._new_chunk()
+
+    def close(self):
+        self.flush()
+        footer = {
+            'address_width': ADDRESS_WIDTH,
+            # dictionaries are stored as lists, the position is the id
+            'dictionaries': {name: list(ids) for name, ids in self.dictionaries.items()},
+            'chunks': self.chunks,
+        }
+        footer_offset = self.file.tell()
+        self.file.write(json.dumps(footer).encode())
+        self.file.write(struct.pack("<Q", footer_offset) + FILE_MAGIC)
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class WalletExportReader:
+    """
+    Memory maps an export file. Iterating yields (label, xpub, path, address, timestamp)
+    rows, chunk_columns() gives the raw columns of a chunk without building rows.
+    The map can only be closed once no view into it is left, so release_chunk() the
+    results of chunk_columns() before close().
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(FILE_MAGIC)] != FILE_MAGIC or self.map[-len(FILE_MAGIC):] != FILE_MAGIC:
+            raise ValueError(f"Not a wallet export file: {path}")
+        footer_end = len(self.map) - len(FILE_MAGIC) - 8
+        footer_offset = struct.unpack_from("<Q", self.map, footer_end)[0]
+        footer = json.loads(self.map[footer_offset:footer_end])
+        self.address_width = footer['address_width']
+        self.dictionaries = footer['dictionaries']
+        self.chunks = footer['chunks']
+
+    def __len__(self):
+        return sum(chunk['rows'] for chunk in self.chunks)
+
+    def chunk_columns(self, chunk):
+        """
+        Returns {column name: memoryview or array} and the raw address block (memoryview)
+        of one chunk. The views point into the mapped file, hand them to release_chunk()
+        when done.
+        """
+        view = memoryview(self.map)
+        rows = chunk['rows']
+        position = chunk['offset'] + len(CHUNK_MAGIC) + 4
+        columns = {}
+        for typecode, size, name in COLUMNS:
+            raw = view[position:position + rows * size]
+            if sys.byteorder == "big":
+                column = array.array(typecode, raw.tobytes())
+                column.byteswap()
+                columns[name] = column
+            else:
+                columns[name] = raw.cast(typecode)
+            position += rows * size
+        addresses = view[position:position + rows * self.address_width]
+        view.release()
+        return columns, addresses
+
+    @staticmethod
+    def release_chunk(columns, addresses):
+        """Releases the memoryviews returned by chunk_columns()."""
+        for view in list(columns.values()) + [addresses]:
+            if isinstance(view, memoryview):
+                view.release()
+
+    def __iter__(self):
+        labels = self.dictionaries['label']
+        xpubs = self.dictionaries['xpub']
+        prefixes = self.dictionaries['path_prefix']
+        width = self.address_width
+        for chunk in self.chunks:
+            # copied out of the map, so no view is open while rows are handed out and the
+            # reader can be closed any time, also in the middle of the iteration
+            views, addresses = self.chunk_columns(chunk)
+            try:
+                address_bytes = addresses.tobytes()
+                columns = {name: array.array(view.format, view.tobytes()) if isinstance(view, memoryview) else view
+                           for name, view in views.items()}
+            finally:
+                self.release_chunk(views, addresses)
+            for row, (label, xpub, prefix, index, timestamp) in enumerate(zip(
+                    columns['label'], columns['xpub'], columns['path_prefix'], columns['index'], columns['timestamp'])):
+                address = address_bytes[row * width:(row + 1) * width].rstrip(b"\0").decode()
+                yield labels[label], xpubs[xpub], f"{prefixes[prefix]}/{index}", address, timestamp
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    # python wallet_export.py file.wexp  -> dumps the rows as CSV
+    with WalletExportReader(sys.argv[1]) as reader:
+        print("label,xpub,path,address,timestamp")
+        for row in reader:
+            print(",".join(str(value) for value in row))
@@ -0,0 +1,195 @@
+import os
+import math
+import heapq
+import secrets
+import hashlib
+
+# Bulk issuance guard: duplicate detection across runs and continuous RNG health tests.
+#
+# Uniqueness: every mnemonic and address is reduced to a fingerprint, a kind byte plus
+# the first FINGERPRINT_BYTES bytes of a domain separated SHA-256, so nothing secret
+# is stored. Fingerprints are collected in memory up to run_records, sorted and written
+# to a run file in the store directory (duplicates inside a run are found while
+# sorting). close() streams all run files of this and earlier runs through a k-way merge
+# into one sorted file, equal neighbours are duplicates and are stored once. Memory stays
+# at one run buffer plus one read buffer per run file, whatever the size of the batch or
+# the store. A failed job calls abort() (or leaves the with block with an exception),
+# which deletes its run files and leaves the store as it was. Only one process should
+# use a store directory at a time.
+#
+# RNG health: the entropy of every mnemonic is drawn through entropy() and fed to the
+# repetition count and adaptive proportion tests of NIST SP 800-90B 4.4, one byte per
+# sample. A failing test raises ValueError right away, before the wallet is generated.
+
+FINGERPRINT_BYTES = 8
+RECORD_SIZE = 1 + FINGERPRINT_BYTES
+RUN_RECORDS = 65536
+STORE_FILE = "fingerprints.fp"
+READ_RECORDS = 4096
+FINGERPRINT_KINDS = {b"m": "mnemonic", b"a": "address"}
+
+# Health test parameters: assessed min-entropy per byte of secrets.token_bytes, false
+# alarm probability 2**-ALPHA_BITS per sample and the adaptive proportion window
+MIN_ENTROPY_BITS = 8
+ALPHA_BITS = 40
+APT_WINDOW = 512
+
+
+def fingerprint(kind, value):
+    return kind + hashlib.sha256(b"wallet-guard/" + kind + b"/" + value.encode()).digest()[:FINGERPRINT_BYTES]
+
+
+def repetition_count_cutoff(min_entropy=MIN_ENTROPY_BITS, alpha_bits=ALPHA_BITS):
+    return 1 + math.ceil(alpha_bits / min_entropy)
+
+
+def adaptive_proportion_cutoff(window=APT_WINDOW, min_entropy=MIN_ENTROPY_BITS, alpha_bits=ALPHA_BITS):
+    """C = 1 + CRITBINOM(W, 2**-H, 1 - alpha) as in SP 800-90B 4.4.2."""
+    p = 2.0 ** -min_entropy
+    alpha = 2.0 ** -alpha_bits
+    terms = [math.comb(window, k) * p ** k * (1 - p) ** (window - k) for k in range(window + 1)]
+    # smallest k with P(X > k) <= alpha
+    tail = 0.0
+    for k in range(window, -1, -1):
+        if tail + terms[k] > alpha:
+            return 1 + k
+        tail += terms[k]
+    return 1
+
+
+def _read_records(path, source):
+    """Yields (record, source) from a sorted fingerprint file."""
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(RECORD_SIZE * READ_RECORDS)
+            if not block:
+                return
+            for i in range(0, len(block), RECORD_SIZE):
+                yield block[i:i + RECORD_SIZE], source
+
+
+class EntropyHealth:
+    """Continuous repetition count and adaptive proportion tests over a byte stream."""
+
+    def __init__(self):
+        self.rct_cutoff = repetition_count_cutoff()
+        self.apt_cutoff = adaptive_proportion_cutoff()
+        self.last = None
+        self.repeats = 0
+        self.window_first = None
+        self.window_seen = 0
+        self.window_count = 0
+        self.tested = 0
+
+    def feed(self, data):
+        for sample in data:
+            if sample == self.last:
+                self.repeats += 1
+                if self.repeats >= self.rct_cutoff:
+                    raise ValueError(f"RNG repetition count test failed: {self.repeats} equal samples in a row")
+            else:
+                self.last, self.repeats = sample, 1
+
+            if self.window_seen == 0:
+                self.window_first, self.window_count = sample, 1
+            elif sample == self.window_first:
+                self.window_count += 1
+                if self.window_count >= self.apt_cutoff:
+                    raise ValueError(f"RNG adaptive proportion test failed: {self.window_count} of "
+                                     f"{APT_WINDOW} samples are equal")
+            self.window_seen = (self.window_seen + 1) % APT_WINDOW
+        self.tested += len(data)
+
+
+class WalletGuard:
+    """
+    add_wallet() records the fingerprints of one wallet, entropy() draws health tested
+    entropy. close() merges the fingerprints into the store and raises ValueError if any
+    mnemonic or address was seen before (in this run or an earlier one). abort() drops
+    the run instead. As a context manager it closes on success and aborts on an exception.
+    """
+
+    def __init__(self, store_dir, run_records=RUN_RECORDS):
+        os.makedirs(store_dir, exist_ok=True)
+        self.store_dir = store_dir
+        self.run_records = run_records
+        self.buffer = []
+        self.run_paths = []
+        self.added = 0
+        self.duplicates = []
+        self.health = EntropyHealth()
+
+    def entropy(self, n_bytes):
+        data = secrets.token_bytes(n_bytes)
+        self.health.feed(data)
+        return data
+
+    def add_wallet(self, mnemonic, address):
+        self.buffer.append(fingerprint(b"m", mnemonic))
+        self.buffer.append(fingerprint(b"a", address))
+        self.added += 2
+        if len(self.buffer) >= self.run_records:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self.buffer.sort()
+        for previous, record in zip(self.buffer, self.buffer[1:]):
+            if previous == record:
+                self.duplicates.append(record)
+        path = os.path.join(self.store_dir, f"run_{os.getpid()}_{len(self.run_paths):06d}.fp")
+        with open(path, "wb") as f:
+            f.write(b"".join(self.buffer))
+        self.run_paths.append(path)
+        self.buffer = []
+
+    def close(self):
+        self.flush()
+        store_path = os.path.join(self.store_dir, STORE_FILE)
+        sources = self.run_paths + ([store_path] if os.path.exists(store_path) else [])
+        # duplicates inside one run file were found by flush(), only count the ones across files
+        total = 0
+        previous = None
+        try:
+            with open(store_path + ".tmp", "wb") as out:
+                for record, source in heapq.merge(*(_read_records(path, n) for n, path in enumerate(sources))):
+                    if previous is not None and record == previous[0]:
+                        if source != previous[1]:
+                            self.duplicates.append(record)
+                    else:
+                        out.write(record)
+                        total += 1
+                    previous = record, source
+            os.replace(store_path + ".tmp", store_path)
+        finally:
+            if os.path.exists(store_path + ".tmp"):
+                os.remove(store_path + ".tmp")
+            self._remove_runs()
+
+        print(f"Uniqueness: {self.added} fingerprints added, {total} in store, {len(self.duplicates)} duplicates")
+        print(f"RNG health: {self.health.tested} entropy bytes passed the repetition count and adaptive proportion tests")
+        if self.duplicates:
+            listed = ", ".join(f"{FINGERPRINT_KINDS[record[:1]]} {record[1:].hex()}" for record in self.duplicates[:10])
+            raise ValueError(f"Duplicate wallets generated (fingerprints): {listed}")
+        return total
+
+    def abort(self):
+        """Drops this run: deletes its run files, the store is left as it was."""
+        self.buffer = []
+        self._remove_runs()
+
+    def _remove_runs(self):
+        for path in self.run_paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self.run_paths = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
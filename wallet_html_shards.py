@@ -0,0 +1,116 @@
+import os
+import json
+import hashlib
+import html
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ShardWriter:
+    """
+    Splits a wallet printout into numbered HTML files of a fixed number of wallets.
+
+    Wallets are added one by one while they are generated. As soon as a shard is full it
+    is rendered and written by a background thread, so the generator never holds more
+    than a few shards in memory. Every shard gets a print manifest next to it, and
+    close() writes a lightweight index page linking all shards.
+    """
+
+    def __init__(self, out_dir, base_name, title, render_shard, wallets_per_shard,
+                 wallets_per_page=1, max_workers=4):
+        # keep shards page aligned, a printed page should never be split over two files
+        pages_per_shard = max(1, -(-wallets_per_shard // wallets_per_page))
+        self.wallets_per_shard = pages_per_shard * wallets_per_page
+        self.wallets_per_page = wallets_per_page
+        self.out_dir = out_dir
+        self.base_name = base_name
+        self.title = title
+        # render_shard(shard_title, sections) -> html text, sections is {section title: [wallets]},
+        # wallets are wallet_record.WalletRecord (or anything with an .address for the manifest)
+        self.render_shard = render_shard
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.futures = []
+        self.sections = {}
+        self.count = 0
+        self.first_index = 0
+        os.makedirs(out_dir, exist_ok=True)
+
+    def add(self, section_title, wallet_data):
+        self.sections.setdefault(section_title, []).append(wallet_data)
+        self.count += 1
+        if self.count - self.first_index == self.wallets_per_shard:
+            self.flush()
+
+    def flush(self):
+        if self.count == self.first_index:
+            return
+        shard_number = len(self.futures) + 1
+        future = self.executor.submit(self._write_shard, shard_number, self.sections,
+                                      self.first_index, self.count)
+        self.futures.append(future)
+        self.sections = {}
+        self.first_index = self.count
+
+    def _write_shard(self, shard_number, sections, first_index, end_index):
+        file_name = f"{self.base_name}_{shard_number:04d}.html"
+        shard_title = f"{self.title} ({shard_number})"
+        html_content = self.render_shard(shard_title, sections)
+        data = html_content.encode()
+        with open(os.path.join(self.out_dir, file_name), "wb") as f:
+            f.write(data)
+
+        pages = sum(-(-len(wallets) // self.wallets_per_page) for wallets in sections.values())
+        manifest = {
+            'shard': shard_number,
+            'file': file_name,
+            'title': shard_title,
+            'wallets': end_index - first_index,
+            'first_wallet': first_index + 1,
+            'last_wallet': end_index,
+            'pages': pages,
+            'sections': {title: len(wallets) for title, wallets in sections.items()},
+            # public data only, so a printed sheet can be matched back to its shard
+            'addresses': [wallet.address for wallets in sections.values() for wallet in wallets],
+            'sha256': hashlib.sha256(data).hexdigest(),
+        }
+        manifest_name = f"{self.base_name}_{shard_number:04d}.manifest.json"
+        with open(os.path.join(self.out_dir, manifest_name), "w") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    def close(self):
+        """Writes the remaining wallets and the index page, returns the path of the index."""
+        self.flush()
+        manifests = [future.result() for future in self.futures]
+        self.executor.shutdown()
+
+        rows = "".join(
+            f"<tr><td><a href=\"{html.escape(m['file'])}\">{m['shard']}</a></td>"
+            f"<td>{m['first_wallet']}-{m['last_wallet']}</td><td>{m['pages']}</td>"
+            f"<td>{html.escape(', '.join(f'{t}: {n}' for t, n in m['sections'].items()))}</td></tr>"
+            for m in manifests
+        )
+        index_html = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{html.escape(self.title)}</title>
+    <style>
+        body {{ font-family: monospace; margin: 20px; }}
+        table {{ border-collapse: collapse; }}
+        td, th {{ border: 1px solid #ccc; padding: 4px 8px; }}
+    </style>
+</head>
+<body>
+    <h1>{html.escape(self.title)}</h1>
+    <p>{self.count} wallets in {len(manifests)} files. Open and print one file at a time.</p>
+    <table>
+        <tr><th>File</th><th>Wallets</th><th>Pages</th><th>Sections</th></tr>
+        {rows}
+    </table>
+</body>
+</html>
+"""
+        index_path = os.path.join(self.out_dir, f"{self.base_name}_index.html")
+        with open(index_path, "w") as f:
+            f.write(index_html)
+        return index_path
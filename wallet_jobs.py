@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Non-interactive runs: a job spec file and/or command line flags instead of input() prompts.
+#
+# A job spec is JSON or TOML (Python 3.11+), either a plain list of jobs or
+#
+#   {"defaults": {"format": "pdf"},
+#    "jobs": [{"job": "team a", "title": "Team A", "wallets_12": 50, "output": "team_a.pdf"},
+#             {"job": "team b", "title": "Team B", "wallets_12": 20}]}
+#
+# in TOML a [defaults] table and [[jobs]] tables. Every job is the script's field defaults,
+# then the spec defaults, then the job entry, then any command line flags on top. The
+# optional "job" key only names the job in the summary report.
+#
+# All jobs run in the same process one after the other, so bip_utils, the QR tables etc.
+# are loaded once, and the pool from shared_executor() is started once and reused by
+# every job (verification, QR batches, address book chunks, card derivation).
+#
+# The pool is a process pool unless JOB_POOL (or the WALLET_JOB_POOL environment
+# variable) is 'thread'. Where processes cannot be started (sandboxes that disallow
+# fork, no semaphore support) it falls back to threads by itself, so no script needs
+# multiprocessing; threads give up the parallelism of the CPU bound stages but every
+# output stays the same.
+
+# Number of workers of the shared pool, None uses all cores
+JOB_WORKERS = None
+# 'process' or 'thread'
+JOB_POOL = os.environ.get("WALLET_JOB_POOL") or "process"
+
+_executor = None
+
+
+def _process_executor():
+    """A started process pool, None if this platform or sandbox cannot run one."""
+    executor = None
+    try:
+        executor = ProcessPoolExecutor(max_workers=JOB_WORKERS)
+        # processes are only started on the first task, so start one now
+        executor.submit(int).result()
+        return executor
+    except (OSError, NotImplementedError, ImportError, BrokenProcessPool) as e:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        print(f"Process pool not available ({e or type(e).__name__}), using threads")
+        return None
+
+
+def shared_executor():
+    """Pool shared by all jobs of this process (see JOB_POOL), started on first use."""
+    global _executor
+    if _executor is None:
+        if JOB_POOL not in ("process", "thread"):
+            raise ValueError(f"JOB_POOL must be 'process' or 'thread', got {JOB_POOL!r}")
+        if JOB_POOL == "process":
+            _executor = _process_executor()
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=shared_pool_size(), thread_name_prefix="job")
+        atexit.register(_executor.shutdown)
+    return _executor
+
+
+def shared_pool_size():
+    """Number of workers of the shared pool."""
+    return JOB_WORKERS or os.cpu_count() or 1
+
+
+def load_job_spec(path):
+    """Returns (defaults, jobs) of a .json or .toml job spec."""
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML job specs need Python 3.11 or newer, use JSON instead")
+        with open(path, "rb") as f:
+            spec = tomllib.load(f)
+    else:
+        with open(path) as f:
+            spec = json.load(f)
+    if isinstance(spec, list):
+        return {}, spec
+    if not isinstance(spec, dict) or not isinstance(spec.get('jobs'), list):
+        raise ValueError(f"{path}: expected a list of jobs or a 'jobs' list")
+    return spec.get('defaults', {}), spec['jobs']
+
+
+def build_job(fields, *layers):
+    """
+    Merges the layers of job settings over the field defaults and converts and checks
+    every value. fields is {name: (type, default, help, choices)}.
+    """
+    job = {name: default for name, (_, default, _, _) in fields.items()}
+    job['job'] = None
+    for layer in layers:
+        for name, value in layer.items():
+            if name != 'job' and name not in fields:
+                raise ValueError(f"Unknown job setting '{name}', expected one of: {', '.join(fields)}")
+            job[name] = value
+    for name, (value_type, _, _, choices) in fields.items():
+        if job[name] is None:
+            continue
+        try:
+            job[name] = value_type(job[name])
+        except (TypeError, ValueError):
+            raise ValueError(f"Job setting '{name}' must be {value_type.__name__}, got {job[name]!r}")
+        if choices and job[name] not in choices:
+            raise ValueError(f"Job setting '{name}' must be one of {', '.join(map(str, choices))}, got {job[name]!r}")
+    return job
+
+
+def parse_jobs(fields, description, argv=None):
+    """
+    Returns the list of jobs given by --jobs and the field flags, or None when the script
+    was started without arguments (it then asks with input() as before).
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return None
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--jobs", metavar="FILE", help="job spec (.json or .toml) describing one or more jobs")
+    for name, (_, default, help_text, choices) in fields.items():
+        default_text = f" (default {default})" if default not in (None, "") else ""
+        parser.add_argument(f"--{name.replace('_', '-')}", dest=name, choices=choices and [str(c) for c in choices],
+                            help=help_text + default_text)
+    args = vars(parser.parse_args(argv))
+    spec_path = args.pop('jobs')
+    flags = {name: value for name, value in args.items() if value is not None}
+    if not spec_path:
+        return [build_job(fields, flags)]
+    defaults, jobs = load_job_spec(spec_path)
+    return [build_job(fields, defaults, job, flags) for job in jobs]
+
+
+def check_job_targets(jobs):
+    """
+    Raises ValueError if two jobs (or the output and export of one job) name the same
+    output or export file, before any job has run.
+    """
+    owners = {}
+    for number, job in enumerate(jobs, start=1):
+        label = job['job'] or f"job {number}"
+        for name in ('output', 'export'):
+            path = job.get(name)
+            if not path:
+                continue
+            key = os.path.normcase(os.path.abspath(path))
+            if key in owners:
+                raise ValueError(f"{owners[key]} and {label} ({name}) both write {path}, give every job its own file")
+            owners[key] = f"{label} ({name})"
+
+
+def job_file_name(job, file_name):
+    """
+    Default output name of a job: file_name itself for a single job, with the job number
+    before the extension when several jobs run together, so jobs never share a default.
+    """
+    if job.get('job_count', 1) <= 1:
+        return file_name
+    stem, extension = os.path.splitext(file_name)
+    return f"{stem}_{job['job_number']}{extension}"
+
+
+def check_new_target(job, path):
+    """
+    In a run of several jobs, raises ValueError if path already exists, so a job never
+    replaces the output of an earlier job or run. Single runs overwrite as before.
+    """
+    if path and job.get('job_count', 1) > 1 and os.path.exists(path):
+        raise ValueError(f"{path} already exists, give the job its own output or remove the file")
+
+
+def run_jobs(jobs, run_job):
+    """
+    Runs every job, a failing job is reported and the next one started. Prints a summary
+    and returns the number of failed jobs. run_job returns a short result text (usually
+    the output path) for the summary. Jobs that name the same output or export file are
+    rejected up front (check_job_targets); run_job picks default names with
+    job_file_name() and calls check_new_target() on every file it is about to write.
+    """
+    check_job_targets(jobs)
+    results = []
+    for number, job in enumerate(jobs, start=1):
+        job['job_number'], job['job_count'] = number, len(jobs)
+        label = job['job'] or f"job {number}"
+        print(f"=== {label} ({number}/{len(jobs)})")
+        started = time.monotonic()
+        try:
+            result, status = run_job(job), "ok"
+        except Exception as e:
+            result, status = f"{type(e).__name__}: {e}", "FAILED"
+            print(f"{label} failed: {result}")
+        results.append((label, status, time.monotonic() - started, result or ""))
+
+    width = max((len(label) for label, _, _, _ in results), default=0)
+    print("\nJob summary")
+    for label, status, seconds, result in results:
+        print(f"  {label:<{width}}  {status:<6}  {seconds:8.1f}s  {result}")
+    failed = sum(1 for _, status, _, _ in results if status != "ok")
+    print(f"{len(results) - failed} of {len(results)} jobs succeeded")
+    return failed
@@ -0,0 +1,102 @@
+import re
+import base64
+from io import BytesIO
+import qrcode
+from qrcode.exceptions import DataOverflowError
+from PIL import Image
+
+# Fast QR encoding for the payloads the wallet scripts print over and over.
+#
+# qrcode.QRCode(version=1) + make(fit=True) searches for the smallest version and then
+# tries all 8 masks in pure Python for every single code. Addresses and xpubs have
+# fixed lengths, so the version (and encoding mode) is known up front and the mask can
+# be pinned; that skips both searches. Anything else (mnemonics, free text) still goes
+# through the normal fit=True path.
+
+ERROR_CORRECTION = qrcode.constants.ERROR_CORRECT_L
+
+# Mask used for the known payload classes, None searches for the best mask as qrcode does
+PINNED_MASK = 0
+
+# payload class -> (regex, version at ERROR_CORRECT_L, encode uppercase)
+# Bech32 is case insensitive and uppercase fits the alphanumeric mode: 42 characters
+# need version 2 instead of version 3 in byte mode.
+PAYLOAD_CLASSES = {
+    'p2wpkh': (re.compile(r"bc1q[02-9ac-hj-np-z]{38}"), 2, True),
+    'base58_address': (re.compile(r"[13][1-9A-HJ-NP-Za-km-z]{25,33}"), 3, False),
+    'extended_key': (re.compile(r"[xyz](pub|prv)[1-9A-HJ-NP-Za-km-z]{107}"), 6, False),
+}
+
+
+def payload_class(data):
+    for name, (pattern, _, _) in PAYLOAD_CLASSES.items():
+        if pattern.fullmatch(data):
+            return name
+    return None
+
+
+def qr_payload(data, uppercase_bech32=True):
+    """The text qr_matrix(data) actually encodes (bech32 addresses in uppercase)."""
+    name = payload_class(data)
+    if name is not None and PAYLOAD_CLASSES[name][2] and uppercase_bech32:
+        return data.upper()
+    return data
+
+
+def qr_matrix(data, uppercase_bech32=True):
+    """Returns the QR modules of data as a list of rows of bools (no quiet zone)."""
+    name = payload_class(data)
+    if name is not None:
+        _, version, _ = PAYLOAD_CLASSES[name]
+        qr = qrcode.QRCode(version=version, error_correction=ERROR_CORRECTION, mask_pattern=PINNED_MASK)
+        qr.add_data(qr_payload(data, uppercase_bech32), optimize=0)
+        try:
+            qr.make(fit=False)
+            return qr.modules
+        except DataOverflowError:
+            pass
+    qr = qrcode.QRCode(version=1, error_correction=ERROR_CORRECTION)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr.modules
+
+
+def matrix_to_image(modules, box_size=5, border=2):
+    """Black on white PIL image of a QR matrix, the same as qrcode's make_image() gives."""
+    size = len(modules) + 2 * border
+    blank_row = b"\xff" * size
+    rows = [blank_row] * border
+    side = b"\xff" * border
+    for row in modules:
+        rows.append(side + bytes(0 if module else 255 for module in row) + side)
+    rows.extend([blank_row] * border)
+    img = Image.frombytes("L", (size, size), b"".join(rows))
+    return img.resize((size * box_size, size * box_size), Image.NEAREST).convert("1")
+
+
+def pack_matrix(modules):
+    """QR matrix as raw bits, row by row, after one byte holding the side length."""
+    size = len(modules)
+    bits = "".join("1" if module else "0" for row in modules for module in row)
+    return bytes([size]) + int(bits, 2).to_bytes((size * size + 7) // 8, "big")
+
+
+def unpack_matrix(packed):
+    size = packed[0]
+    bits = bin(int.from_bytes(packed[1:], "big"))[2:].zfill((len(packed) - 1) * 8)[-size * size:]
+    return [[bit == "1" for bit in bits[row * size:(row + 1) * size]] for row in range(size)]
+
+
+def image_to_png_base64(img):
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return base64.b64encode(buffered.getvalue()).decode()
+
+
+def qr_image(data, box_size=5, border=2):
+    return matrix_to_image(qr_matrix(data), box_size, border)
+
+
+def qr_png_base64(data, box_size=5, border=2):
+    return image_to_png_base64(qr_image(data, box_size, border))
+
@@ -0,0 +1,75 @@
+import sys
+from wallet_qr import qr_matrix, pack_matrix, unpack_matrix, matrix_to_image, image_to_png_base64
+
+# Compact wallet record for the bulk generators.
+#
+# A wallet as a tuple of 24 word strings, address, base64 PNG, path and creation time is
+# about 2.5 KB of Python objects. WalletRecord keeps
+#
+#   words    the mnemonic as packed 11-bit word list indices, 17 bytes for 12 words
+#            and 33 for 24 (this is the entropy plus the checksum)
+#   address  the address string
+#   qr       the QR matrix of the address as raw bits (wallet_qr.pack_matrix), ~110 bytes
+#   path, created  interned, every record of a run shares the same two strings
+#
+# in __slots__, under 400 bytes per wallet. Words and QR images are expanded only when a
+# card is rendered (words(), modules(), qr_png_base64()). Records pickle as their five
+# fields, and the shared path and creation time strings are written only once per
+# pickled chunk, so passing them between processes costs little more than the raw bytes.
+
+_wordlist = None
+_word_index = None
+
+
+def _load_wordlist():
+    global _wordlist, _word_index
+    if _wordlist is None:
+        from mnemonic import Mnemonic
+        _wordlist = Mnemonic("english").wordlist
+        _word_index = {word: i for i, word in enumerate(_wordlist)}
+
+
+def pack_words(words):
+    """BIP39 words as 11-bit indices, packed big endian into the fewest bytes."""
+    _load_wordlist()
+    value = 0
+    for word in words:
+        value = value << 11 | _word_index[word]
+    n_bytes = (len(words) * 11 + 7) // 8
+    # left aligned, so the padding bits are at the end
+    return (value << (n_bytes * 8 - len(words) * 11)).to_bytes(n_bytes, "big")
+
+
+def unpack_words(packed):
+    _load_wordlist()
+    count = len(packed) * 8 // 11
+    value = int.from_bytes(packed, "big") >> (len(packed) * 8 - count * 11)
+    return [_wordlist[value >> (11 * (count - 1 - i)) & 0x7FF] for i in range(count)]
+
+
+class WalletRecord:
+    __slots__ = ('packed_words', 'address', 'qr', 'path', 'created')
+
+    def __init__(self, packed_words, address, qr, path, created):
+        self.packed_words = packed_words
+        self.address = address
+        self.qr = qr
+        self.path = sys.intern(path)
+        self.created = sys.intern(created)
+
+    @classmethod
+    def from_words(cls, words, address, path, created):
+        """Builds the record of a generated wallet, the QR matrix is encoded here."""
+        return cls(pack_words(words), address, pack_matrix(qr_matrix(address)), path, created)
+
+    def __reduce__(self):
+        return WalletRecord, (self.packed_words, self.address, self.qr, self.path, self.created)
+
+    def words(self):
+        return unpack_words(self.packed_words)
+
+    def modules(self):
+        return unpack_matrix(self.qr)
+
+    def qr_png_base64(self, box_size=5, border=2):
+        return image_to_png_base64(matrix_to_image(self.modules(), box_size, border))
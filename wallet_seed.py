@@ -0,0 +1,80 @@
+import os
+import hashlib
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# BIP39 seed stretching (PBKDF2-HMAC-SHA512, 2048 rounds) on threads.
+#
+# Stretching the mnemonic into the seed is the most expensive step of deriving a wallet.
+# hashlib.pbkdf2_hmac runs inside OpenSSL with the GIL released, so a plain thread pool
+# scales over the cores without a process pool (which sandboxed deployments may not be
+# allowed to fork) and without pickling anything. The seeds are byte for byte the ones
+# bip_utils' Bip39SeedGenerator(mnemonic).Generate() gives, which the verifier
+# (wallet_verify) uses to re-derive them independently.
+#
+# stretch_seeds() keeps at most QUEUE_PER_THREAD mnemonics per thread in flight (or the
+# max_in_flight it is given), so it can be fed from a generator of any length and memory
+# stays flat.
+
+# Threads of the shared stretching pool, None uses all cores
+SEED_THREADS = None
+QUEUE_PER_THREAD = 4
+PBKDF2_ROUNDS = 2048
+
+_executor = None
+_mnemo = None
+
+
+def seed_executor():
+    """Thread pool shared by all seed stretching of this process, started on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=seed_threads(), thread_name_prefix="seed")
+    return _executor
+
+
+def check_mnemonic(mnemonic):
+    """Raises ValueError if mnemonic is not a valid English BIP39 mnemonic (words and checksum)."""
+    global _mnemo
+    if _mnemo is None:
+        from mnemonic import Mnemonic
+        _mnemo = Mnemonic("english")
+    if not _mnemo.check(mnemonic):
+        raise ValueError(f"Invalid BIP39 mnemonic ({len(mnemonic.split())} words): unknown word or bad checksum")
+
+
+def mnemonic_to_seed(mnemonic, passphrase="", validate=False):
+    """64 byte BIP39 seed of mnemonic and the optional passphrase."""
+    if validate:
+        check_mnemonic(mnemonic)
+    mnemonic = unicodedata.normalize("NFKD", mnemonic)
+    salt = unicodedata.normalize("NFKD", "mnemonic" + passphrase)
+    return hashlib.pbkdf2_hmac("sha512", mnemonic.encode(), salt.encode(), PBKDF2_ROUNDS)
+
+
+def _stretch_job(mnemonic, passphrase, validate):
+    return mnemonic_to_seed(mnemonic, passphrase, validate)
+
+
+def seed_threads():
+    """Number of threads of the shared stretching pool."""
+    return SEED_THREADS or os.cpu_count() or 1
+
+
+def stretch_seeds(pairs, validate=False, executor=None, max_in_flight=None):
+    """
+    Yields the seed of every (mnemonic, passphrase) pair, in input order, stretched on the
+    shared thread pool (or the given executor) with at most max_in_flight mnemonics
+    submitted ahead, by default QUEUE_PER_THREAD per shared pool thread. With
+    validate=True an invalid mnemonic raises ValueError when its seed is reached.
+    """
+    executor = executor or seed_executor()
+    depth = max_in_flight or seed_threads() * QUEUE_PER_THREAD
+    pending = deque()
+    for mnemonic, passphrase in pairs:
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+        pending.append(executor.submit(_stretch_job, mnemonic, passphrase, validate))
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,57 @@
+import os
+import json
+import base64
+from datetime import datetime
+
+# Public-only sidecar of a generated wallet: account xpubs, derived addresses and their
+# pre-encoded QR matrices (wallet_qr.pack_matrix), keyed by the master key fingerprint.
+# Renderers rebuild the public pages (xpub table, address tables) from it without the
+# mnemonic, the PBKDF2 seed stretch or any derivation. Nothing secret is written here.
+#
+# A sidecar is only valid for the layout version of the renderer that wrote it. When a
+# renderer changes its layout (or QR settings) it bumps its version and older sidecars
+# are ignored by load_sidecar.
+
+SIDECAR_FORMAT = 1
+
+
+def sidecar_path(directory, fingerprint):
+    return os.path.join(directory, f"{fingerprint}.sidecar.json")
+
+
+def write_sidecar(directory, fingerprint, layout_version, seed_name, created, xpubs, addresses, qr_matrices):
+    """
+    xpubs is {bip type: account xpub}, addresses is {bip type: [address, ...]} and
+    qr_matrices is {payload: packed matrix} for the xpubs and addresses.
+    """
+    os.makedirs(directory, exist_ok=True)
+    sidecar = {
+        'format': SIDECAR_FORMAT,
+        'layout_version': layout_version,
+        'fingerprint': fingerprint,
+        'seed_name': seed_name,
+        'created': created.isoformat(),
+        'xpubs': xpubs,
+        'addresses': addresses,
+        'qr': {payload: base64.b64encode(packed).decode() for payload, packed in qr_matrices.items()},
+    }
+    path = sidecar_path(directory, fingerprint)
+    # write and rename, a half written sidecar must never be picked up
+    with open(path + ".tmp", "w") as f:
+        json.dump(sidecar, f)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def load_sidecar(path, layout_version):
+    """
+    Returns the sidecar with created as datetime and qr as {payload: packed matrix},
+    or None when it was written for another layout version (or sidecar format).
+    """
+    with open(path) as f:
+        sidecar = json.load(f)
+    if sidecar.get('format') != SIDECAR_FORMAT or sidecar.get('layout_version') != layout_version:
+        return None
+    sidecar['created'] = datetime.fromisoformat(sidecar['created'])
+    sidecar['qr'] = {payload: base64.b64decode(packed) for payload, packed in sidecar['qr'].items()}
+    return sidecar
@@ -0,0 +1,147 @@
+import os
+import math
+import time
+import itertools
+from collections import deque
+
+# Auto-tuned parallel map for the derivation stage of the bulk card generators.
+#
+# TunedMap.map() runs a CPU bound function (address derivation) over the items in the
+# shared pool, while the caller takes the results one by one and does everything else
+# in the main process (export, guard, rendering, writing). Only this map is tuned, the
+# caller's stages are measured together as one per-item cost and are not parallelized
+# here. The first WARMUP_ITEMS items run in-process and time the function and the caller;
+# from that:
+#
+#   parallel tasks  chunks running at once so the function keeps up with the caller, at
+#                   most one less than the cores (the caller needs one) and at most the
+#                   pool size, 0 = in-process
+#   chunk size      items per task so one task takes about TARGET_TASK_SECONDS, which keeps
+#                   the pickling and scheduling overhead small against the work
+#   queue depth     chunks submitted ahead, QUEUE_CHUNKS_PER_TASK per parallel task, so
+#                   the pool never waits for the caller and memory stays bounded
+#
+# Every REEVALUATE_SECONDS the costs measured during the run (tasks report their own
+# busy time) are fed back and the configuration is chosen again. The pool is not
+# resized: its size is passed in, and the processes not used by this map stay free for
+# the verifier.
+
+WARMUP_ITEMS = 8
+TARGET_TASK_SECONDS = 0.1
+MAX_CHUNK_SIZE = 512
+QUEUE_CHUNKS_PER_TASK = 2
+REEVALUATE_SECONDS = 5.0
+RETUNE_CHUNK_CHANGE = 0.25
+# weight of the newest measurement in the running cost averages
+SMOOTHING = 0.3
+
+
+def run_chunk(job):
+    """Worker entry point: applies function to every item of a chunk and times it."""
+    function, items = job
+    started = time.perf_counter()
+    results = [function(item) for item in items]
+    return results, time.perf_counter() - started
+
+
+def choose_configuration(work_cost, caller_cost, cpus, pool_size):
+    """Returns (parallel tasks, chunk size, queue depth) for per-item costs in seconds."""
+    chunk_size = max(1, min(MAX_CHUNK_SIZE, round(TARGET_TASK_SECONDS / max(work_cost, 1e-6))))
+    if cpus <= 1 or pool_size < 1:
+        return 0, chunk_size, 0
+    tasks = math.ceil(work_cost / max(caller_cost, 1e-6))
+    tasks = max(1, min(tasks, cpus - 1, pool_size))
+    return tasks, chunk_size, tasks * QUEUE_CHUNKS_PER_TASK
+
+
+class TunedMap:
+    """
+    map(items) yields function(item) for every item, in order, and tunes itself while
+    doing so. function must be a module level function (it is sent to the pool).
+    executor_factory returns the pool, pool_size is its number of workers.
+    """
+
+    def __init__(self, name, function, executor_factory, pool_size, cpus=None):
+        self.name = name
+        self.function = function
+        self.executor_factory = executor_factory
+        self.pool_size = pool_size
+        self.cpus = cpus or os.cpu_count() or 1
+        self.work_cost = None
+        self.caller_cost = None
+        self.configuration = None
+        self.history = []
+
+    def _measure(self, attribute, value):
+        previous = getattr(self, attribute)
+        setattr(self, attribute, value if previous is None else previous + SMOOTHING * (value - previous))
+
+    def _choose(self):
+        executor = self.executor_factory() if self.cpus > 1 and self.pool_size > 0 else None
+        configuration = choose_configuration(self.work_cost, self.caller_cost, self.cpus, self.pool_size if executor else 0)
+        if self.configuration is None or self._changed(configuration):
+            self.configuration = configuration
+            self.history.append(configuration)
+            print(self._describe())
+        return executor
+
+    def _changed(self, configuration):
+        # a new task count always counts, the chunk size only when it moved by more than
+        # RETUNE_CHUNK_CHANGE, so small drifts of the measurements don't flap the setting
+        tasks, chunk_size, _ = configuration
+        current_tasks, current_chunk_size, _ = self.configuration
+        return tasks != current_tasks or abs(chunk_size - current_chunk_size) > RETUNE_CHUNK_CHANGE * current_chunk_size
+
+    def _describe(self):
+        tasks, chunk_size, depth = self.configuration
+        parallel = f"{tasks} of {self.pool_size} pool workers, queue depth {depth} chunks" if tasks else "in-process"
+        return (f"Auto-tune {self.name}: {parallel}, chunk size {chunk_size} (work {self.work_cost * 1000:.1f} "
+                f"ms/item, caller {self.caller_cost * 1000:.1f} ms/item)")
+
+    def map(self, items):
+        items = iter(items)
+        # warm-up: function and caller in-process, one item at a time
+        warmed_up = 0
+        for item in itertools.islice(items, WARMUP_ITEMS):
+            warmed_up += 1
+            started = time.perf_counter()
+            result = self.function(item)
+            self._measure('work_cost', time.perf_counter() - started)
+            resumed = time.perf_counter()
+            yield result
+            self._measure('caller_cost', time.perf_counter() - resumed)
+        if warmed_up < WARMUP_ITEMS:
+            return
+        executor = self._choose()
+        pending = deque()
+        last_evaluation = time.monotonic()
+        exhausted = False
+        while True:
+            tasks, chunk_size, depth = self.configuration
+            if tasks == 0:
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk:
+                    break
+                results, busy = run_chunk((self.function, chunk))
+            else:
+                while not exhausted and len(pending) < depth:
+                    chunk = list(itertools.islice(items, chunk_size))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending.append(executor.submit(run_chunk, (self.function, chunk)))
+                if not pending:
+                    break
+                results, busy = pending.popleft().result()
+            self._measure('work_cost', busy / len(results))
+            resumed = time.perf_counter()
+            yield from results
+            self._measure('caller_cost', (time.perf_counter() - resumed) / len(results))
+            if time.monotonic() - last_evaluation > REEVALUATE_SECONDS:
+                executor = self._choose()
+                last_evaluation = time.monotonic()
+
+    def report(self):
+        if self.configuration is None:
+            return f"Auto-tune {self.name}: finished during the warm-up, in-process"
+        return f"{self._describe()}, {len(self.history) - 1} re-tunings"
@@ -0,0 +1,253 @@
+import os
+import re
+import time
+import shutil
+import tempfile
+import threading
+import hmac
+import random
+import hashlib
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import wallet_ec
+from wallet_ec import N
+
+# Independent re-derivation of printed addresses.
+#
+# BIP32 private derivation and the base58 and bech32 encoding are deliberately
+# implemented here with hashlib only, so that they share no code with bip_utils, which
+# produced the address in the first place. The BIP39 seed stretch goes the other way:
+# the scripts stretch with hashlib (wallet_seed.py), so the verifier uses bip_utils'
+# Bip39SeedGenerator. Public keys come from the verifier backend selected in wallet_ec,
+# which by default is neither the one bip_utils uses nor the one wallet_ec derives
+# addresses with. Checks run in a worker pool (processes or threads) and can be sampled.
+#
+# Outputs are written under a temporary name (staged_output) and only get their final
+# name once the verifier has closed without a mismatch.
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+
+def hash160(data):
+    sha = hashlib.sha256(data).digest()
+    try:
+        return hashlib.new("ripemd160", sha).digest()
+    except ValueError:
+        # OpenSSL 3 builds may not ship ripemd160, pycryptodome comes with bip_utils
+        from Crypto.Hash import RIPEMD160
+        return RIPEMD160.new(sha).digest()
+
+
+@lru_cache(maxsize=64)
+def mnemonic_to_seed(words, passphrase=""):
+    # not wallet_seed's hashlib code, which stretched the seeds that were printed
+    from bip_utils import Bip39SeedGenerator
+    return Bip39SeedGenerator(" ".join(words)).Generate(passphrase)
+
+
+@lru_cache(maxsize=256)
+def derive_node(seed, path):
+    """
+    BIP32 private derivation of path (e.g. m/84'/0'/0'/0/0), returns (key, chain code, public key).
+    Parent nodes are cached, so address books from one seed only pay for the last level.
+    """
+    if path == "m":
+        digest = hmac.new(b"Bitcoin seed", seed, hashlib.sha512).digest()
+    else:
+        parent_path, level = path.rsplit("/", 1)
+        parent_key, parent_chain_code, parent_pubkey = derive_node(seed, parent_path)
+        hardened = level.endswith("'") or level.endswith("h")
+        index = int(level.rstrip("'h")) + (2**31 if hardened else 0)
+        if hardened:
+            data = b"\x00" + parent_key.to_bytes(32, "big") + index.to_bytes(4, "big")
+        else:
+            data = parent_pubkey + index.to_bytes(4, "big")
+        digest = hmac.new(parent_chain_code, data, hashlib.sha512).digest()
+    key = int.from_bytes(digest[:32], "big")
+    if path != "m":
+        key = (key + parent_key) % N
+    return key, digest[32:], wallet_ec.verify_pubkey(key)
+
+
+def base58check(payload):
+    data = payload + hashlib.sha256(hashlib.sha256(payload).digest()).digest()[:4]
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, rem = divmod(number, 58)
+        encoded = BASE58_ALPHABET[rem] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * leading_zeros + encoded
+
+
+def _bech32_polymod(values):
+    generator = [0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3]
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1FFFFFF) << 5 ^ value
+        for i in range(5):
+            chk ^= generator[i] if ((top >> i) & 1) else 0
+    return chk
+
+
+def segwit_v0_address(hrp, program):
+    data = [0]
+    acc, bits = 0, 0
+    for byte in program:
+        acc = (acc << 8) | byte
+        bits += 8
+        while bits >= 5:
+            bits -= 5
+            data.append((acc >> bits) & 31)
+    if bits:
+        data.append((acc << (5 - bits)) & 31)
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    polymod = _bech32_polymod(expanded + data + [0] * 6) ^ 1
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return hrp + "1" + "".join(BECH32_CHARSET[d] for d in data + checksum)
+
+
+def address_for_path(words, path, passphrase=""):
+    """Re-derives the mainnet address of path (BIP44, BIP49 or BIP84 purpose) from the words."""
+    _, _, pubkey = derive_node(mnemonic_to_seed(tuple(words), passphrase), path)
+    pubkey_hash = hash160(pubkey)
+    purpose = path.split("/")[1].rstrip("'h")
+    if purpose == "44":
+        return base58check(b"\x00" + pubkey_hash)
+    if purpose == "49":
+        redeem_script = b"\x00\x14" + pubkey_hash
+        return base58check(b"\x05" + hash160(redeem_script))
+    if purpose == "84":
+        return segwit_v0_address("bc", pubkey_hash)
+    raise ValueError(f"Unsupported derivation path: {path}")
+
+
+def check_address(job):
+    """
+    Worker entry point, returns (address, path, what did not match) when the printed
+    address or its QR code does not belong to the words, None otherwise. qr is the packed
+    QR matrix that was drawn (wallet_qr.pack_matrix), None when there is none to check.
+    Bech32 addresses may be printed in uppercase.
+    """
+    words, address, path, qr = job
+    expected = address_for_path(words, path)
+    if address != expected and not (expected.startswith("bc1") and address == expected.upper()):
+        return address, path, "address"
+    if qr is not None:
+        # the QR encoder is not independent, but this catches a code drawn for another row
+        from wallet_qr import qr_matrix, pack_matrix
+        if qr != pack_matrix(qr_matrix(expected)):
+            return address, path, "QR code"
+    return None
+
+
+WALLET_HTML_PATTERN = re.compile(
+    r"<div class=\"seed_phrase\">(.*?)</div>\s*<div class=\"address_container\">.*?"
+    r"Derivation Path \(BIP84\): (\S+)</p>.*?<p class=\"address\">(\w+)</p>",
+    re.S,
+)
+WORD_HTML_PATTERN = re.compile(r"<div class='word'><span>\d+\.</span> (\w+)</div>")
+
+
+def parse_wallet_html(html_text):
+    """Yields (words, address, derivation path) of every wallet card found in a rendered page."""
+    for match in WALLET_HTML_PATTERN.finditer(html_text):
+        words = WORD_HTML_PATTERN.findall(match.group(1))
+        yield words, match.group(3), match.group(2)
+
+
+class Verifier:
+    """
+    Checks emitted (words, address, path) triples in a process pool while rendering goes on.
+
+    sample_rate is the fraction of wallets that get checked (1.0 = all of them). Once
+    time_budget seconds have passed since the verifier was created no new checks are
+    started, the remaining wallets are counted as skipped. close() waits for the running
+    checks and raises ValueError if any printed address does not belong to its words.
+    An executor passed in (e.g. a pool shared by several jobs) is used and left running.
+    """
+
+    def __init__(self, sample_rate=1.0, time_budget=None, max_workers=None, executor=None):
+        self.sample_rate = sample_rate
+        self.time_budget = time_budget
+        self.started = time.monotonic()
+        self.own_executor = executor is None
+        self.executor = ProcessPoolExecutor(max_workers=max_workers) if executor is None else executor
+        self.futures = []
+        self.skipped = 0
+        # shard writers submit from their own threads
+        self.lock = threading.Lock()
+
+    def submit(self, words, address, path, qr=None):
+        with self.lock:
+            if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+                self.skipped += 1
+                return
+            if self.time_budget is not None and time.monotonic() - self.started > self.time_budget:
+                self.skipped += 1
+                return
+            self.futures.append(self.executor.submit(check_address, (list(words), address, path, qr)))
+
+    def submit_html(self, html_text, expected=None):
+        """
+        Submits every wallet card found in rendered HTML and returns how many were found.
+        With expected (the number of wallets rendered) a different count raises
+        ValueError, so markup the pattern no longer matches cannot pass unchecked.
+        """
+        found = 0
+        for words, address, path in parse_wallet_html(html_text):
+            self.submit(words, address, path)
+            found += 1
+        if expected is not None and found != expected:
+            raise ValueError(f"Found {found} wallet cards in the rendered HTML, {expected} were rendered")
+        return found
+
+    def close(self):
+        mismatches = [mismatch for mismatch in (f.result() for f in self.futures) if mismatch is not None]
+        if self.own_executor:
+            self.executor.shutdown()
+        print(f"Verification: {len(self.futures)} addresses re-derived, {self.skipped} skipped, "
+              f"{len(mismatches)} mismatches ({wallet_ec.backend_report()})")
+        if mismatches:
+            listed = ", ".join(f"{address} ({path}, {what})" for address, path, what in mismatches)
+            raise ValueError(f"Printed addresses do not match their mnemonic: {listed}")
+        return len(self.futures), self.skipped
+
+
+def _remove(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+@contextmanager
+def staged_output(path, directory=False):
+    """
+    Yields a new temporary name next to path to write an output to, a file or, with
+    directory=True, a directory (sharded HTML). If the block (writing and
+    Verifier.close()) raises, the temporary output is deleted, otherwise it is renamed to
+    path. A directory is moved into path entry by entry.
+    """
+    parent, name = os.path.split(path.rstrip(os.sep))
+    # a fresh name every time, nothing that already exists next to path is touched
+    if directory:
+        staged = tempfile.mkdtemp(prefix=f".{name}.", suffix=".tmp", dir=parent or ".")
+    else:
+        fd, staged = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=parent or ".")
+        os.close(fd)
+    try:
+        yield staged
+    except BaseException:
+        _remove(staged)
+        raise
+    if directory:
+        os.makedirs(path, exist_ok=True)
+        for entry in sorted(os.listdir(staged)):
+            os.replace(os.path.join(staged, entry), os.path.join(path, entry))
+        os.rmdir(staged)
+    else:
+        os.replace(staged, path)